@@ -0,0 +1,266 @@
+"""Adaptive search over the continuous trade-filter parameters
+
+Suchraum pro Asset: FILTER_PARAMS (long_th, short_th, ma_len, atr_pct_max,
+cooldown_absret_max) + scale aus score_to_prob_up.
+
+Successive Halving unter festem Budget:
+- Rung 0: viele zufällige Kandidaten (+ die aktuellen FILTER_PARAMS) auf dem
+  jüngsten Ausschnitt der Historie (min_fraction der Bars -> billig)
+- je Rung bleibt das beste 1/eta, der Ausschnitt wächst um Faktor eta
+- letzte Rung: volle Historie
+
+Budget = Anzahl Voll-Auswertungen (eine Auswertung auf fraction f kostet f).
+
+Bewertung wie im Backtest: Bar i handelt final_signal aus df.iloc[:i] und wird
+mit close[i] -> close[i + HORIZON] verglichen. Ziel ist die untere Wilson-Grenze
+der Trefferquote (kleine Stichproben werden nicht belohnt), mit Mindestanzahl Trades.
+
+    python adaptive_optimizer.py --budget 60 --seed 0
+
+schreibt backtests/proposed_filter_params.csv (Vorschlag, trade_filter.py bleibt unverändert).
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from asset_config import ASSETS
+from backtest_engine import WARMUP_BARS, HORIZON
+from data_loader import load_market_data
+from decision_engine import score_to_prob_up_array
+from model_core import momentum_score_series
+from trade_filter import FILTER_PARAMS, apply_trade_filter_batch
+
+
+PROPOSAL_PATH = "backtests/proposed_filter_params.csv"
+
+DEFAULT_SCALE = 150.0
+
+# (lo, hi, typ) pro Parameter
+SEARCH_SPACE = {
+    "long_th": (0.50, 0.70, float),
+    "short_th": (0.30, 0.50, float),
+    "ma_len": (50, 250, int),
+    "atr_pct_max": (0.8, 4.0, float),
+    "cooldown_absret_max": (1.0, 5.0, float),
+    "scale": (50.0, 400.0, float),
+}
+
+# Nachkommastellen im Vorschlag
+PARAM_DIGITS = {"long_th": 3, "short_th": 3, "atr_pct_max": 2, "cooldown_absret_max": 2, "scale": 1}
+
+# Vorlauf vor dem Ausschnitt: längste MA + ATR, damit die Indikatoren wie auf der vollen Serie sind
+WINDOW_WARMUP = SEARCH_SPACE["ma_len"][1] + 15
+
+MIN_TRADES = 50
+WILSON_Z = 1.0
+
+DEFAULT_BUDGET = 60
+DEFAULT_ETA = 3
+DEFAULT_MIN_FRACTION = 1 / 9
+
+
+def wilson_lower(hits: int, n: int, z: float = WILSON_Z) -> float:
+    if n == 0:
+        return 0.0
+    p = hits / n
+    denom = 1.0 + z * z / n
+    centre = p + z * z / (2 * n)
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    return (centre - margin) / denom
+
+
+def sample_params(rng: np.random.Generator, n: int) -> List[Dict[str, Any]]:
+    out = []
+    for _ in range(n):
+        p = {}
+        for key, (lo, hi, typ) in SEARCH_SPACE.items():
+            if typ is int:
+                p[key] = int(rng.integers(lo, hi + 1))
+            else:
+                p[key] = round(float(rng.uniform(lo, hi)), PARAM_DIGITS.get(key, 4))
+        out.append(p)
+    return out
+
+
+def current_params(asset: str) -> Optional[Dict[str, Any]]:
+    params = FILTER_PARAMS.get(asset)
+    if params is None:
+        return None
+    return {**params, "scale": DEFAULT_SCALE}
+
+
+class AssetObjective:
+    """
+    Hält Kurse + Momentum-Score eines Assets (einmal berechnet) und bewertet
+    Parameter-Sätze auf dem jüngsten Ausschnitt (fraction) der Historie.
+    """
+
+    def __init__(self, asset: str, df: pd.DataFrame, min_trades: int = MIN_TRADES):
+        self.asset = asset
+        self.df = df
+        self.min_trades = min_trades
+        self.close = df["close"].to_numpy(dtype=float)
+        self.score = momentum_score_series(df["close"])
+        self.evaluations = 0.0
+
+    def _window(self, fraction: float):
+        # Bewertungs-Bars [first, end) wie run_backtest; Slice ab first - WINDOW_WARMUP
+        end = len(self.df) - HORIZON
+        span = end - WARMUP_BARS
+        first = end - max(1, int(round(span * min(1.0, fraction))))
+        lo = max(0, first - WINDOW_WARMUP)
+        return lo, first, end
+
+    def evaluate(self, params: Dict[str, Any], fraction: float = 1.0) -> Dict[str, Any]:
+        lo, first, end = self._window(fraction)
+        self.evaluations += min(1.0, fraction)
+
+        part = self.df.iloc[lo:end]
+        # gleiche Rundung wie der Backtest (forecast_asset rundet auf 4 Stellen), sonst kippen Grenzfälle
+        prob_up = score_to_prob_up_array(self.score[lo:end], params.get("scale", DEFAULT_SCALE))
+        prob_up = np.array([round(v, 4) for v in prob_up.tolist()])
+        filter_params = {k: params[k] for k in ("long_th", "short_th", "ma_len", "atr_pct_max", "cooldown_absret_max")}
+
+        batch = apply_trade_filter_batch(self.asset, part, prob_up, params=filter_params, render=False)
+
+        # Bar i nutzt die Batch-Zeile i - 1 (Prefix df.iloc[:i])
+        final = batch["final_signal"].to_numpy()[first - 1 - lo:end - 1 - lo]
+        side = np.where(final == "BUY", 1.0, np.where(final == "SELL", -1.0, 0.0))
+        ret = self.close[first + HORIZON:end + HORIZON] / self.close[first:end] - 1
+
+        traded = side != 0
+        trades = int(traded.sum())
+        signed = side[traded] * ret[traded]
+        hits = int((signed > 0).sum())
+
+        needed = max(10, int(self.min_trades * min(1.0, fraction)))
+        objective = wilson_lower(hits, trades) if trades >= needed else -1.0
+
+        return {
+            "trades": trades,
+            "winrate": hits / trades if trades else float("nan"),
+            "avg_return": float(signed.mean()) if trades else float("nan"),
+            "objective": objective,
+            "fraction": min(1.0, fraction),
+        }
+
+
+def successive_halving(
+    objective: AssetObjective,
+    budget: float = DEFAULT_BUDGET,
+    eta: int = DEFAULT_ETA,
+    min_fraction: float = DEFAULT_MIN_FRACTION,
+    seed: int = 0,
+    incumbent: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Returns: alle Auswertungen der letzten Rung (volle Historie), bestes zuerst.
+    Jede Rung kostet ~ n0 * min_fraction Voll-Auswertungen -> n0 aus dem Budget.
+    """
+    rungs = int(math.ceil(math.log(1.0 / min_fraction, eta) - 1e-9)) + 1
+    n0 = max(eta, int(budget / (rungs * min_fraction)))
+
+    rng = np.random.default_rng(seed)
+    candidates = sample_params(rng, n0 - (1 if incumbent else 0))
+    if incumbent:
+        candidates.insert(0, dict(incumbent))
+
+    fraction = min_fraction
+    scored = []
+    for rung in range(rungs):
+        if rung == rungs - 1:
+            fraction = 1.0
+
+        scored = [{**p, **objective.evaluate(p, fraction)} for p in candidates]
+        # stabile Sortierung: bei Gleichstand gewinnt der frühere Kandidat
+        scored.sort(key=lambda r: -r["objective"])
+
+        keep = max(1, len(candidates) // eta)
+        candidates = [{k: r[k] for k in SEARCH_SPACE} for r in scored[:keep]]
+        fraction *= eta
+
+    return scored
+
+
+def optimize_asset(asset: str, cfg: Dict[str, Any], budget: float = DEFAULT_BUDGET, eta: int = DEFAULT_ETA,
+                   min_fraction: float = DEFAULT_MIN_FRACTION, seed: int = 0, df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Vorschlag für ein Asset: bester Kandidat + Vergleich mit den aktuellen FILTER_PARAMS
+    (beide auf der vollen Historie bewertet).
+    """
+    print(f"Optimizing filter params for {asset}")
+
+    if df is None:
+        df = load_market_data(cfg["ticker"], cfg, intervals=("1d",))
+
+    objective = AssetObjective(asset, df)
+    incumbent = current_params(asset)
+
+    final = successive_halving(objective, budget=budget, eta=eta, min_fraction=min_fraction, seed=seed, incumbent=incumbent)
+    best = final[0]
+
+    row = {"asset": asset}
+    row.update({k: best[k] for k in SEARCH_SPACE})
+    row.update({k: best[k] for k in ("trades", "winrate", "avg_return", "objective")})
+
+    if incumbent is not None:
+        cur = objective.evaluate(incumbent, 1.0)
+        row.update({f"current_{k}": cur[k] for k in ("trades", "winrate", "objective")})
+
+    row["evaluations"] = round(objective.evaluations, 2)
+    return row
+
+
+def _safe_optimize_asset(asset, cfg, budget, eta, min_fraction, seed):
+    # Fehler eines Assets isolieren (Worker darf den Pool nicht abbrechen)
+    try:
+        return optimize_asset(asset, cfg, budget=budget, eta=eta, min_fraction=min_fraction, seed=seed)
+    except Exception as e:
+        print(f"ERROR {asset}: {e}")
+        return {"asset": asset, "error": str(e)}
+
+
+def optimize_all(assets=None, budget: float = DEFAULT_BUDGET, eta: int = DEFAULT_ETA,
+                 min_fraction: float = DEFAULT_MIN_FRACTION, seed: int = 0, workers: Optional[int] = None) -> pd.DataFrame:
+    assets = assets or ASSETS
+    workers = workers or os.cpu_count() or 1
+    args = (budget, eta, min_fraction, seed)
+
+    if workers == 1:
+        rows = [_safe_optimize_asset(asset, cfg, *args) for asset, cfg in assets.items()]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(assets))) as pool:
+            futures = [pool.submit(_safe_optimize_asset, asset, cfg, *args) for asset, cfg in assets.items()]
+            rows = [f.result() for f in futures]
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive search (successive halving) over trade-filter parameters")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Voll-Auswertungen pro Asset")
+    parser.add_argument("--eta", type=int, default=DEFAULT_ETA, help="Reduktionsfaktor pro Rung")
+    parser.add_argument("--min-fraction", type=float, default=DEFAULT_MIN_FRACTION, help="Anteil der Bars in Rung 0")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse (Default: CPU-Kerne, 1 = sequentiell)")
+    parser.add_argument("--out", default=PROPOSAL_PATH, help="Vorschlagstabelle (CSV)")
+    args = parser.parse_args()
+
+    table = optimize_all(budget=args.budget, eta=args.eta, min_fraction=args.min_fraction, seed=args.seed, workers=args.workers)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    table.to_csv(args.out, index=False)
+    print(table.to_string(index=False))
+    print("PROPOSED PARAMS WRITTEN:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
-import pandas as pd
+from backtest_store import load_results
 
 
-def analyze_results(all_results):
+ANALYTICS_COLUMNS = ["date", "signal", "prob_up", "future_return"]
 
-    df = pd.DataFrame(all_results)
+
+def analyze_results(all_results, assets=None, years=None, horizon=None):
+    """
+    all_results: Liste von dicts, BacktestResults, CSV-Pfad oder Dataset-Verzeichnis
+    (beim Dataset werden nur ANALYTICS_COLUMNS und die gewählten Partitionen gelesen).
+    horizon: Forward-Return-Horizont in Bars (Default: future_return = 5 Bars).
+    """
+
+    df = load_results(all_results, columns=ANALYTICS_COLUMNS, assets=assets, years=years, horizon=horizon)
 
     if len(df) == 0:
         print("No results")
@@ -27,3 +35,28 @@ def analyze_results(all_results):
         subset = df[(df["prob_up"] >= low) & (df["prob_up"] < high)]
         winrate = (subset["future_return"] > 0).mean() * 100
         print(f"{low}-{high}: {winrate:.2f}% ({len(subset)} trades)")
+
+
+def summarize_results(asset, results, horizon=None):
+    """
+    Kompakte Kennzahlen eines Backtests (statt alle Zeilen im Speicher zu halten).
+    """
+    df = load_results(results, columns=ANALYTICS_COLUMNS, horizon=horizon)
+
+    summary = {"asset": asset, "rows": len(df)}
+    if len(df) == 0:
+        return summary
+
+    buy = df.loc[df["signal"] == "BUY", "future_return"]
+    sell = df.loc[df["signal"] == "SELL", "future_return"]
+
+    summary.update({
+        "start": str(df["date"].iloc[0]),
+        "end": str(df["date"].iloc[-1]),
+        "buy_trades": len(buy),
+        "sell_trades": len(sell),
+        "buy_winrate": round(float((buy > 0).mean() * 100), 2) if len(buy) else None,
+        "sell_winrate": round(float((sell < 0).mean() * 100), 2) if len(sell) else None,
+        "avg_future_return": round(float(df["future_return"].mean()), 6),
+    })
+    return summary
@@ -4,7 +4,7 @@ from model_core import run_model
 from decision_engine import generate_signal
 
 def run_backtest(symbol):
-    df = load_market_data(symbol)
+    df = load_market_data(symbol, intervals=("1d",))
 
     results = []
     for i in range(10, len(df)):
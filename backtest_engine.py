@@ -1,23 +1,250 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
 from forecast_asset import forecast_asset
 from data_loader import load_market_data
+from model_core import momentum_score_series, MomentumState
+from decision_engine import generate_signal, generate_signal_arrays
+from regime_adjustment import regime_series
+from trade_filter import FILTER_PARAMS, RULE_CODE_NO_PARAMS, apply_trade_filter_batch, encode_rule_codes
+from backtest_results import BacktestResults, encode_signals, encode_labels
+
+
+WARMUP_BARS = 200
+HORIZON = 5
+
+# Vorlauf je Zeit-Shard: max(20-Bar Momentum + 1 für pct_change, MA200, ATR14 + 1)
+SHARD_WARMUP_BARS = max(20 + 1, 200, 14 + 1)
+
+# Bars pro Chunk beim Streamen in ein Dataset (~1 Handelsjahr)
+STREAM_CHUNK_BARS = 252
+
+
+def _round(values, ndigits=4):
+    # Python round (nicht np.round) -> bit-identisch mit forecast_asset
+    return [round(v, ndigits) for v in values]
+
+
+def forward_returns(close, start, end, horizons):
+    """
+    Forward-Returns close[i + h] / close[i] - 1 für alle Bars start .. end - 1
+    und alle Horizonte in einem Schritt (Shape: len(horizons) x (end - start)).
+    Bars ohne genug Zukunft -> NaN.
+    """
+    max_h = max(horizons)
+    padded = np.concatenate([close, np.full(max_h, np.nan)])
+    base = close[start:end]
+    return np.vstack([padded[start + h:end + h] / base - 1 for h in horizons])
+
+
+def _backtest_bars(df, start, end, filter_asset=None, horizons=None):
+    """
+    Vektorisierter Kern: Ergebnisse für die Bars start .. end - 1 von df.
+    Braucht Daten ab Bar start - SHARD_WARMUP_BARS (oder ab 0) und bis end + max(horizons).
+    filter_asset: zusätzlich trade_filter (final_signal + rule) für dieses Asset.
+    horizons: zusätzliche Forward-Returns/Hits pro Horizont (future_return_<h>, hit_<h>).
+    """
+    m = max(0, end - start)
+    params = FILTER_PARAMS.get(filter_asset) if filter_asset is not None else None
+    out = BacktestResults(m, with_filter=filter_asset is not None, filter_params=params, horizons=horizons)
+    if m == 0:
+        return out
+
+    close = df["close"].to_numpy(dtype=float)
+
+    # Modell-Output des Prefix df.iloc[:i] = Serienwert an Position i - 1
+    score = momentum_score_series(df["close"])[start - 1:end - 1]
+    decision = generate_signal_arrays(score)
+
+    out.date[:] = df.index[start:end].to_numpy(dtype="datetime64[ns]")
+    # forecast_asset rundet prob_up/confidence (prob_down wird beim Schreiben abgeleitet)
+    out.prob_up[:] = _round(decision["prob_up"].tolist())
+    out.confidence[:] = _round(decision["confidence"].tolist())
+    out.future_return[:] = close[start + HORIZON:end + HORIZON] / close[start:end] - 1
+    if horizons:
+        out.forward[:] = forward_returns(close, start, end, horizons)
+    out.signal[:] = encode_signals(decision["signal"])
+    out.regime[:] = encode_labels(regime_series(df)[start - 1:end - 1], out.regime_labels)
+
+    if filter_asset is not None:
+        if params is None:
+            out.final_signal[:] = out.signal
+            out.rule_code[:] = RULE_CODE_NO_PARAMS
+        else:
+            # Filter auf Prefix df.iloc[:i] = Batch-Zeile i - 1 (mit dem gerundeten prob_up wie live)
+            p = np.full(len(df), 0.5)
+            p[start - 1:end - 1] = out.prob_up
+            batch = apply_trade_filter_batch(filter_asset, df, p, params=params, render=False)
+            batch = batch.iloc[start - 1:end - 1]
+
+            out.final_signal[:] = encode_signals(batch["final_signal"].tolist())
+            out.rule_code[:] = encode_rule_codes(batch["m1"], batch["m2"], batch["m3"], batch["m4"])
+            out.atr_pct[:] = batch["atr_pct"].to_numpy()
+            out.abs_ret[:] = batch["abs_ret"].to_numpy()
+
+    return out
+
+
+def run_backtest(asset_name, asset_cfg, df=None, apply_filter=False, horizons=None):
+    """
+    Vektorisierter Backtest: Score, Signal, Regime und 5-Bar-Forward-Return
+    für alle Bars in einem Durchlauf (O(n) statt O(n²)).
+
+    Ergebnis ist identisch zu run_backtest_loop: Bar i wird mit den Daten
+    bis i-1 bewertet (df.iloc[:i]) und mit close[i] -> close[i + 5] verglichen.
+
+    apply_filter=True ergänzt final_signal + rule aus trade_filter (Batch, O(n)).
+    horizons=[1, 3, 5, 10, 20] ergänzt future_return_<h>/hit_<h> für jeden Horizont
+    (future_return bleibt der 5-Bar-Return, die Zeilen bleiben dieselben).
+    """
+
+    print(f"Running backtest for {asset_name}")
+
+    if df is None:
+        df = load_market_data(asset_cfg["ticker"], asset_cfg, intervals=("1d",))
+
+    return _backtest_bars(df, WARMUP_BARS, len(df) - HORIZON, asset_name if apply_filter else None, horizons)
+
+
+def _shard_bounds(start, end, shards):
+    edges = np.linspace(start, end, shards + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _lookahead(horizons):
+    return max([HORIZON] + list(horizons or []))
+
+
+def _run_shard(df, start, end, filter_asset=None, horizons=None):
+    # Shard = Vorlauf + eigene Bars + längster Horizont für die Forward-Returns
+    lo = max(0, start - SHARD_WARMUP_BARS)
+    part = df.iloc[lo:end + _lookahead(horizons)]
+    return _backtest_bars(part, start - lo, end - lo, filter_asset, horizons)
+
+
+def run_backtest_sharded(asset_name, asset_cfg, df=None, shards=None, workers=None, apply_filter=False, horizons=None):
+    """
+    Zerlegt die Zeitachse eines Assets in zusammenhängende Shards, rechnet sie
+    parallel (je mit SHARD_WARMUP_BARS Vorlauf) und setzt sie in Reihenfolge
+    wieder zusammen. Ergebnis ist identisch zu run_backtest.
+    """
+
+    print(f"Running sharded backtest for {asset_name}")
+
+    if df is None:
+        df = load_market_data(asset_cfg["ticker"], asset_cfg, intervals=("1d",))
+
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+
+    bounds = _shard_bounds(WARMUP_BARS, len(df) - HORIZON, shards)
+    filter_asset = asset_name if apply_filter else None
+
+    if workers == 1 or len(bounds) <= 1:
+        parts = [_run_shard(df, a, b, filter_asset, horizons) for a, b in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(bounds))) as pool:
+            # nur den benötigten Ausschnitt an den Worker schicken
+            futures = []
+            for a, b in bounds:
+                lo = max(0, a - SHARD_WARMUP_BARS)
+                part = df.iloc[lo:b + _lookahead(horizons)]
+                futures.append(pool.submit(_run_shard, part, a - lo, b - lo, filter_asset, horizons))
+            parts = [f.result() for f in futures]
+
+    return BacktestResults.concat(parts)
+
+
+def stream_backtest(asset_name, asset_cfg, writer, df=None, chunk_bars=STREAM_CHUNK_BARS, apply_filter=False, horizons=None):
+    """
+    Rechnet den Backtest chunkweise (gleicher Kern wie die Zeit-Shards) und
+    übergibt jeden Chunk sofort an writer.write (z.B. BacktestDatasetWriter).
+    Es wird nie das ganze Ergebnis im Speicher gehalten. Returns: Anzahl Zeilen.
+    """
+
+    print(f"Streaming backtest for {asset_name}")
+
+    if df is None:
+        df = load_market_data(asset_cfg["ticker"], asset_cfg, intervals=("1d",))
+
+    start, end = WARMUP_BARS, len(df) - HORIZON
+    shards = max(1, -(-(end - start) // chunk_bars)) if end > start else 0
+    filter_asset = asset_name if apply_filter else None
+
+    rows = 0
+    for a, b in _shard_bounds(start, end, shards) if shards else []:
+        part = _run_shard(df, a, b, filter_asset, horizons)
+        writer.write(part)
+        rows += len(part)
+
+    return rows
+
+
+def run_backtest_streaming(asset_name, asset_cfg, df=None, state=None):
+    """
+    Bar-für-Bar-Backtest über MomentumState (O(1) pro Bar, keine Prefix-Kopien).
+    Gleiches Ergebnis wie run_backtest. state: optional vorgeseedeter
+    MomentumState (Stand: Bars 0 .. WARMUP_BARS - 2).
+    """
+
+    print(f"Running backtest for {asset_name}")
+
+    if df is None:
+        df = load_market_data(asset_cfg["ticker"], asset_cfg, intervals=("1d",))
+
+    close = df["close"].to_numpy(dtype=float)
+    # kausal wie run_backtest: Regime von Bar i - 1 (nur Daten bis dort), nicht adjust_for_regime(df) über alles
+    regimes = regime_series(df)
+
+    if state is None:
+        state = MomentumState.from_history(close[:WARMUP_BARS - 1])
+
+    results = []
+
+    for i in range(WARMUP_BARS, len(df) - HORIZON):
+
+        # Modell sieht Bars bis i - 1
+        state.update(close[i - 1])
+        decision = generate_signal(state.model_output(), regimes[i - 1])
+
+        prob_up = round(float(decision["prob_up"]), 4)
+
+        results.append({
+            "date": df.index[i],
+            "signal": decision["signal"],
+            "confidence": round(float(decision["confidence"]), 4),
+            "prob_up": prob_up,
+            "prob_down": round(1.0 - prob_up, 4),
+            "regime": decision["regime"],
+            "future_return": float(close[i + HORIZON] / close[i] - 1)
+        })
+
+    return results
 
 
-def run_backtest(asset_name, asset_cfg):
+def run_backtest_loop(asset_name, asset_cfg, df=None):
+    """
+    Referenz-Implementierung (Bar für Bar über forecast_asset, O(n²)).
+    Nur noch zum Gegenprüfen von run_backtest.
+    """
 
     print(f"Running backtest for {asset_name}")
 
-    df = load_market_data(asset_cfg["ticker"], asset_cfg)
+    if df is None:
+        df = load_market_data(asset_cfg["ticker"], asset_cfg, intervals=("1d",))
 
     results = []
 
-    for i in range(200, len(df) - 5):
+    for i in range(WARMUP_BARS, len(df) - HORIZON):
 
         sliced_df = df.iloc[:i].copy()
 
         forecast = forecast_asset(asset_name, asset_cfg, df_override=sliced_df)
 
         close_now = df["close"].iloc[i]
-        future_close = df["close"].iloc[i + 5]
+        future_close = df["close"].iloc[i + HORIZON]
 
         future_return = (future_close / close_now) - 1
 
@@ -0,0 +1,187 @@
+"""Columnar backtest results
+
+Statt einer Python-dict pro Bar hält BacktestResults vorab allokierte,
+typisierte Arrays (ca. 34 Byte/Bar, mit Trade-Filter ca. 52 Byte/Bar):
+
+    date            datetime64[ns]
+    prob_up         float64   (bereits auf 4 Stellen gerundet)
+    confidence      float64
+    future_return   float64
+    signal          int8      Code -> SIGNALS
+    regime          int8      Code -> regime_labels
+    final_signal    int8      (nur mit Trade-Filter)
+    rule_code       uint8     trade_filter.encode_rule_codes
+    atr_pct/abs_ret float64   Werte für den Rule-String
+    forward         float64   (len(horizons) x n, nur mit horizons)
+
+Lesbare Strings (signal, regime, rule) und hit_<h> entstehen erst in to_frame().
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from trade_filter import RULE_CODE_NO_PARAMS, decode_rule_codes, render_rule
+
+
+SIGNALS = ("HOLD", "BUY", "SELL")
+SIGNAL_CODES = {s: i for i, s in enumerate(SIGNALS)}
+
+COLUMNS = ["date", "signal", "confidence", "prob_up", "prob_down", "regime", "future_return"]
+FILTER_COLUMNS = ["final_signal", "rule"]
+
+
+def encode_signals(signals: Sequence[str]) -> np.ndarray:
+    return np.fromiter((SIGNAL_CODES[s] for s in signals), dtype=np.int8, count=len(signals))
+
+
+def encode_labels(values: Sequence[str], labels: List[str]) -> np.ndarray:
+    """
+    Kleine Kategorien (z.B. Regime) -> int8-Codes; unbekannte Werte erweitern labels.
+    """
+    lookup = {v: i for i, v in enumerate(labels)}
+    codes = np.empty(len(values), dtype=np.int8)
+    for k, v in enumerate(values):
+        if v not in lookup:
+            lookup[v] = len(labels)
+            labels.append(v)
+        codes[k] = lookup[v]
+    return codes
+
+
+def hit_flags(signal_codes: np.ndarray, ret: np.ndarray) -> np.ndarray:
+    """
+    Treffer wie in forecast_tracker: BUY -> ret > 0, SELL -> ret < 0, HOLD -> 0.
+    Ohne bekannten Return (Ende der Historie) -> NaN.
+    """
+    hit = np.where(
+        signal_codes == SIGNAL_CODES["BUY"], ret > 0,
+        np.where(signal_codes == SIGNAL_CODES["SELL"], ret < 0, False),
+    ).astype(float)
+    hit[np.isnan(ret)] = np.nan
+    return hit
+
+
+class BacktestResults:
+
+    def __init__(
+        self,
+        n: int,
+        with_filter: bool = False,
+        filter_params: Optional[Dict[str, Any]] = None,
+        horizons: Optional[Sequence[int]] = None,
+    ):
+        self.date = np.empty(n, dtype="datetime64[ns]")
+        self.prob_up = np.empty(n, dtype=np.float64)
+        self.confidence = np.empty(n, dtype=np.float64)
+        self.future_return = np.empty(n, dtype=np.float64)
+        self.signal = np.zeros(n, dtype=np.int8)
+        self.regime = np.zeros(n, dtype=np.int8)
+        self.regime_labels: List[str] = []
+
+        self.with_filter = with_filter
+        self.filter_params = filter_params
+        if with_filter:
+            self.final_signal = np.zeros(n, dtype=np.int8)
+            self.rule_code = np.zeros(n, dtype=np.uint8)
+            self.atr_pct = np.full(n, np.nan)
+            self.abs_ret = np.full(n, np.nan)
+
+        self.horizons = tuple(horizons or ())
+        self.forward = np.full((len(self.horizons), n), np.nan)
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.date, self.prob_up, self.confidence, self.future_return, self.signal, self.regime]
+        if self.with_filter:
+            arrays += [self.final_signal, self.rule_code, self.atr_pct, self.abs_ret]
+        arrays.append(self.forward)
+        return sum(a.nbytes for a in arrays)
+
+    # -------------------------
+    # Rendering (erst beim Schreiben)
+    # -------------------------
+    def _prob_down(self) -> List[float]:
+        # wie forecast_asset: aus dem gerundeten prob_up abgeleitet
+        return [round(1.0 - p, 4) for p in self.prob_up.tolist()]
+
+    def _rules(self) -> List[str]:
+        m1, m2, m3, m4 = decode_rule_codes(self.rule_code)
+        return [
+            "no_params" if a == RULE_CODE_NO_PARAMS else render_rule(a, b, c, d, atr, ret, self.filter_params)
+            for a, b, c, d, atr, ret in zip(
+                m1.tolist(), m2.tolist(), m3.tolist(), m4.tolist(), self.atr_pct.tolist(), self.abs_ret.tolist()
+            )
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        signals = np.array(SIGNALS, dtype=object)
+        regimes = np.array(self.regime_labels or ["neutral"], dtype=object)
+
+        data = {
+            "date": pd.DatetimeIndex(self.date),
+            "signal": signals[self.signal],
+            "confidence": self.confidence,
+            "prob_up": self.prob_up,
+            "prob_down": self._prob_down(),
+            "regime": regimes[self.regime],
+            "future_return": self.future_return,
+        }
+        if self.with_filter:
+            data["final_signal"] = signals[self.final_signal]
+            data["rule"] = self._rules()
+
+        for h, ret in zip(self.horizons, self.forward):
+            data[f"future_return_{h}"] = ret
+            data[f"hit_{h}"] = hit_flags(self.signal, ret)
+
+        return pd.DataFrame(data)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Liste von dicts im alten Format (für Vergleiche / Altcode).
+        """
+        return self.to_frame().to_dict("records")
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_records())
+
+    # -------------------------
+    # Zusammensetzen (Zeit-Shards)
+    # -------------------------
+    @classmethod
+    def concat(cls, parts: Sequence["BacktestResults"]) -> "BacktestResults":
+        parts = list(parts)
+        n = sum(len(p) for p in parts)
+        with_filter = bool(parts) and parts[0].with_filter
+        params = parts[0].filter_params if parts else None
+        horizons = parts[0].horizons if parts else None
+
+        out = cls(n, with_filter=with_filter, filter_params=params, horizons=horizons)
+
+        pos = 0
+        for p in parts:
+            sl = slice(pos, pos + len(p))
+            out.date[sl] = p.date
+            out.prob_up[sl] = p.prob_up
+            out.confidence[sl] = p.confidence
+            out.future_return[sl] = p.future_return
+            out.signal[sl] = p.signal
+            # Regime-Codes auf gemeinsame Labels abbilden
+            labels = [p.regime_labels[c] for c in p.regime.tolist()] if p.regime_labels else []
+            out.regime[sl] = encode_labels(labels, out.regime_labels) if labels else p.regime
+            if with_filter:
+                out.final_signal[sl] = p.final_signal
+                out.rule_code[sl] = p.rule_code
+                out.atr_pct[sl] = p.atr_pct
+                out.abs_ret[sl] = p.abs_ret
+            out.forward[:, sl] = p.forward
+            pos += len(p)
+
+        return out
@@ -3,7 +3,7 @@ from forecast_asset import forecast_asset
 from backtest_engine import run_backtest as backtest_engine
 
 def run_backtest(asset, cfg, lookback=252):
-    df = load_market_data(asset, cfg)
+    df = load_market_data(asset, cfg, intervals=("1d",))
 
     results = []
 
@@ -20,8 +20,8 @@ def run_backtest(asset, cfg, lookback=252):
         results.append(forecast)
 from backtest_writer import save_backtest_csv
 
-def run_backtest(asset_name, asset_cfg):
-    results = backtest_engine(asset_name, asset_cfg)
+def run_backtest(asset_name, asset_cfg, horizons=None):
+    results = backtest_engine(asset_name, asset_cfg, horizons=horizons)
 
     # CSV direkt nach Berechnung der Trades speichern
     save_backtest_csv(results, filename=f"raw_backtest_{asset_name}.csv")
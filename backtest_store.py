@@ -0,0 +1,203 @@
+"""Backtest dataset (Parquet, partitioniert nach asset/year)
+
+    backtests/dataset/asset=DAX/year=2016/part-0.parquet
+                                 year=2017/part-0.parquet
+                     asset=ATX/...
+
+- BacktestDatasetWriter schreibt Row-Groups, sobald der Backtest sie liefert
+  (ein offener Writer pro Jahres-Partition) -> Speicher bleibt pro Chunk begrenzt.
+  Geschrieben wird in ein Staging-Verzeichnis (.asset=DAX.tmp), das erst beim
+  fehlerfreien Ende gegen asset=DAX getauscht wird. Bricht der Backtest ab,
+  bleiben die bisherigen Partitionen unverändert.
+- read_backtest_dataset lädt nur die angefragten Spalten und Partitionen.
+- load_results ist der gemeinsame Einstieg für optimizer und analytics
+  (Dataset-Verzeichnis, CSV, BacktestResults oder Liste von dicts).
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+BACKTEST_DATASET_DIR = "backtests/dataset"
+
+
+def _asset_dir(root: str, asset: str, suffix: Optional[str] = None) -> str:
+    # suffix "tmp"/"old": Staging-/Backup-Verzeichnis (".asset=DAX.tmp", für pyarrow.dataset unsichtbar)
+    name = f"asset={asset}"
+    return os.path.join(root, name if suffix is None else f".{name}.{suffix}")
+
+
+def _partition_dir(asset_dir: str, year: int) -> str:
+    return os.path.join(asset_dir, f"year={int(year)}")
+
+
+class BacktestDatasetWriter:
+    """
+    with BacktestDatasetWriter(root, "DAX") as w:
+        for chunk in ...:
+            w.write(chunk)      # BacktestResults oder DataFrame
+    """
+
+    def __init__(self, root: str, asset: str):
+        self.root = root
+        self.asset = asset
+        self.rows = 0
+        self._writers: Dict[int, pq.ParquetWriter] = {}
+        self._schema: Optional[pa.Schema] = None
+
+        # ein Lauf ersetzt die Partitionen dieses Assets komplett - aber erst in close()
+        self._staging = _asset_dir(root, asset, "tmp")
+        shutil.rmtree(self._staging, ignore_errors=True)
+
+    def write(self, chunk) -> None:
+        df = chunk.to_frame() if hasattr(chunk, "to_frame") else pd.DataFrame(chunk)
+        if df.empty:
+            return
+
+        df["date"] = pd.to_datetime(df["date"])
+        years = df["date"].dt.year
+
+        for year, part in df.groupby(years, sort=True):
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            if self._schema is None:
+                self._schema = table.schema
+            else:
+                table = table.cast(self._schema)
+
+            writer = self._writers.get(year)
+            if writer is None:
+                path = _partition_dir(self._staging, year)
+                os.makedirs(path, exist_ok=True)
+                writer = pq.ParquetWriter(os.path.join(path, "part-0.parquet"), self._schema)
+                self._writers[year] = writer
+
+            writer.write_table(table)
+            self.rows += len(part)
+
+    def _close_writers(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def close(self) -> None:
+        """Staging-Verzeichnis gegen die bisherigen Partitionen des Assets tauschen."""
+        self._close_writers()
+        os.makedirs(self._staging, exist_ok=True)
+
+        target = _asset_dir(self.root, self.asset)
+        old = _asset_dir(self.root, self.asset, "old")
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(target):
+            os.replace(target, old)
+        os.replace(self._staging, target)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def abort(self) -> None:
+        """Geschriebenes verwerfen, bisherige Partitionen bleiben unverändert."""
+        self._close_writers()
+        shutil.rmtree(self._staging, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_backtest_dataset(results, asset: str, root: str = BACKTEST_DATASET_DIR) -> str:
+    with BacktestDatasetWriter(root, asset) as writer:
+        writer.write(results)
+    print("DATASET WRITTEN:", _asset_dir(root, asset))
+    return root
+
+
+def read_backtest_dataset(
+    root: str = BACKTEST_DATASET_DIR,
+    assets: Optional[Iterable[str]] = None,
+    years: Optional[Iterable[int]] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Liest nur die benötigten Partitionen (asset/year) und Spalten.
+    Nicht vorhandene Spalten werden ignoriert.
+    """
+    source = root
+    if assets is not None:
+        # nur die Verzeichnisse der gewünschten Assets auflisten
+        source = []
+        for asset in assets:
+            asset_dir = _asset_dir(root, asset)
+            for dirpath, _, files in os.walk(asset_dir):
+                source += [os.path.join(dirpath, f) for f in sorted(files) if f.endswith(".parquet") and not f.startswith(".")]
+        if not source:
+            return pd.DataFrame(columns=columns or [])
+
+    dataset = ds.dataset(source, format="parquet", partitioning="hive", partition_base_dir=root)
+
+    flt = None
+    if years is not None:
+        flt = ds.field("year").isin([int(y) for y in years])
+
+    if columns is not None:
+        columns = [c for c in columns if c in dataset.schema.names]
+
+    table = dataset.to_table(columns=columns, filter=flt)
+    df = table.to_pandas()
+
+    if "date" in df.columns:
+        df = df.sort_values("date", kind="stable").reset_index(drop=True)
+    return df
+
+
+def select_horizon(df: pd.DataFrame, horizon: Optional[int]) -> pd.DataFrame:
+    """
+    Macht future_return_<horizon> zur Spalte future_return (die Auswertungen
+    arbeiten immer auf future_return). horizon=None -> unverändert (5 Bars).
+    """
+    if horizon is None:
+        return df
+    col = f"future_return_{horizon}"
+    if col not in df.columns:
+        raise KeyError(f"Horizon {horizon} not in backtest results (run_backtest(..., horizons=[...]))")
+    df = df.copy()
+    df["future_return"] = df[col]
+    return df
+
+
+def load_results(source, columns: Optional[List[str]] = None, assets=None, years=None, horizon=None) -> pd.DataFrame:
+    """
+    Einheitlicher Loader:
+      - Dataset-Verzeichnis -> read_backtest_dataset (Spalten-/Partition-Pruning)
+      - CSV-Pfad            -> read_csv(usecols=...)
+      - BacktestResults / Liste von dicts / DataFrame
+    horizon wählt den Forward-Return-Horizont (siehe select_horizon).
+    """
+    if columns is not None and horizon is not None:
+        columns = list(columns) + [f"future_return_{horizon}"]
+
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            df = read_backtest_dataset(source, assets=assets, years=years, columns=columns)
+        elif columns is None:
+            df = pd.read_csv(source)
+        else:
+            df = pd.read_csv(source, usecols=lambda c: c in columns)
+    elif isinstance(source, pd.DataFrame):
+        df = source
+    elif hasattr(source, "to_frame"):
+        df = source.to_frame()
+    else:
+        df = pd.DataFrame(source)
+
+    return select_horizon(df, horizon)
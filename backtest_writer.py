@@ -1,12 +1,29 @@
 import pandas as pd
 
+CSV_COLUMNS = [
+    "date", "symbol", "signal", "close", "future_close", "future_return",
+    "confidence", "prob_up", "prob_down", "regime",
+]
+
+
 def save_backtest_csv(results, filename):
+    # Columnar BacktestResults: eine Bulk-Konvertierung statt dict pro Zeile
+    if hasattr(results, "to_frame"):
+        df = results.to_frame()
+        for col in CSV_COLUMNS:
+            if col not in df.columns:
+                df[col] = None
+        extra = [c for c in df.columns if c not in CSV_COLUMNS]
+        df[CSV_COLUMNS + extra].to_csv(filename, index=False)
+        print("CSV WRITTEN:", filename)
+        return
+
     rows = []
 
     for r in results:
         future_return = r.get("future_return", r.get("return"))
 
-        rows.append({
+        row = {
             "date": r.get("date"),
             "symbol": r.get("symbol"),
             "signal": r.get("signal"),
@@ -17,7 +34,14 @@ def save_backtest_csv(results, filename):
             "prob_up": r.get("prob_up"),
             "prob_down": r.get("prob_down"),
             "regime": r.get("regime"),
-        })
+        }
+
+        # nur bei gefilterten Backtests (run_backtest(..., apply_filter=True))
+        if "final_signal" in r:
+            row["final_signal"] = r.get("final_signal")
+            row["rule"] = r.get("rule")
+
+        rows.append(row)
 
     pd.DataFrame(rows).to_csv(filename, index=False)
     print("CSV WRITTEN:", filename)
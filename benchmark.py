@@ -0,0 +1,378 @@
+"""Performance benchmark (offline, synthetische Kursdaten)
+
+Misst die Hot Paths auf reproduzierbaren, geseedeten OHLCV-Daten statt yfinance:
+
+    run_model, generate_signal, apply_trade_filter, run_backtest,
+    run_optimizer, append_history
+
+pro Datengröße (Jahre x Bars pro Jahr) Wall-Time (Best-of/Median) und
+Peak-Memory (tracemalloc, separater Lauf).
+
+    python benchmark.py --years 1,5,10 --assets 6 --out benchmarks/baseline.json
+    python benchmark.py --years 1,5,10 --assets 6 --compare benchmarks/baseline.json --threshold 0.25
+
+--compare meldet Regressionen (Zeit oder Speicher > Baseline * (1 + threshold))
+und beendet sich dann mit Exit-Code 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+BASELINE_PATH = "benchmarks/baseline.json"
+
+BARS_PER_DAY = {"1d": 1, "1h": 7}
+TRADING_DAYS_PER_YEAR = 252
+
+DEFAULT_YEARS = (1, 5, 10)
+DEFAULT_ASSETS = 6
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+
+# Echte Asset-Namen -> trade_filter nutzt die FILTER_PARAMS wie im Live-Lauf
+ASSET_NAMES = ("DAX", "ATX", "DOW", "NASDAQ", "SP500", "NIKKEI")
+
+
+# =========================
+# Synthetische Daten
+# =========================
+def bars_per_year(freq: str = "1d") -> int:
+    return TRADING_DAYS_PER_YEAR * BARS_PER_DAY[freq]
+
+
+def synthetic_ohlcv(n_bars: int, seed: int = 0, freq: str = "1d", start: str = "2000-01-03",
+                    drift: float = 0.0002, vol: float = 0.012) -> pd.DataFrame:
+    """
+    Geometrische Brownsche Bewegung + plausible open/high/low/volume.
+    Gleicher seed -> gleiche Daten (bit-identisch).
+    """
+    rng = np.random.default_rng(seed)
+    per_day = BARS_PER_DAY[freq]
+    bar_vol = vol / np.sqrt(per_day)
+
+    close = 100.0 * np.exp(np.cumsum(rng.normal(drift / per_day, bar_vol, n_bars)))
+    prev = np.concatenate([[100.0], close[:-1]])
+    open_ = prev * (1.0 + rng.normal(0.0, bar_vol / 4, n_bars))
+    high = np.maximum(open_, close) * (1.0 + np.abs(rng.normal(0.0, bar_vol / 2, n_bars)))
+    low = np.minimum(open_, close) * (1.0 - np.abs(rng.normal(0.0, bar_vol / 2, n_bars)))
+    volume = rng.lognormal(15.0, 0.4, n_bars).round()
+
+    days = pd.bdate_range(start, periods=-(-n_bars // per_day))
+    if per_day == 1:
+        index = days
+    else:
+        hours = pd.to_timedelta(np.arange(9, 9 + per_day), unit="h")
+        index = pd.DatetimeIndex((days.values[:, None] + hours.values[None, :]).ravel())
+    index = index[:n_bars]
+
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+
+def synthetic_market(assets: int = DEFAULT_ASSETS, years: float = 1, freq: str = "1d", seed: int = 0) -> Dict[str, pd.DataFrame]:
+    n_bars = int(round(years * bars_per_year(freq)))
+    names = [ASSET_NAMES[i] if i < len(ASSET_NAMES) else f"SYN{i}" for i in range(assets)]
+    return {name: synthetic_ohlcv(n_bars, seed=seed + i, freq=freq) for i, name in enumerate(names)}
+
+
+def optimizer_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Backtest-Ergebnis + die Spalten, die optimizer.apply_filters erwartet
+    (close, ema200, atr, atr_median, weekday).
+    """
+    from backtest_engine import run_backtest
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        res = run_backtest("DAX", {}, df=df).to_frame()
+
+    prev_close = df["close"].shift(1)
+    tr = pd.concat([
+        df["high"] - df["low"],
+        (df["high"] - prev_close).abs(),
+        (df["low"] - prev_close).abs(),
+    ], axis=1).max(axis=1)
+    atr = tr.rolling(14).mean()
+
+    extra = pd.DataFrame({
+        "close": df["close"],
+        "ema200": df["close"].ewm(span=200, adjust=False).mean(),
+        "atr": atr,
+        "atr_median": atr.rolling(100, min_periods=1).median(),
+        "weekday": df.index.weekday,
+    }, index=df.index)
+
+    return res.join(extra, on="date")
+
+
+# =========================
+# Messung
+# =========================
+def measure(fn: Callable[[], Any], setup: Optional[Callable[[], None]] = None, repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    """
+    repeat x Wall-Time (setup läuft jeweils ungemessen davor), dann ein
+    Lauf unter tracemalloc für den Peak-Speicher. Ausgaben (print) werden verschluckt.
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "wall_s": min(times),
+        "wall_median_s": statistics.median(times),
+        "peak_mb": peak / 2**20,
+        "repeat": repeat,
+    }
+
+
+# =========================
+# Benchmarks
+# =========================
+# Jeder Case bekommt die synthetischen Daten und liefert (fn, setup)
+def _bench_run_model(market, tmp):
+    from model_core import run_model
+    frames = list(market.values())
+    return (lambda: [run_model(df) for df in frames]), None
+
+
+def _bench_generate_signal(market, tmp):
+    # Live-Pfad pro Bar: ein generate_signal-Aufruf je Asset und Bar
+    from model_core import momentum_score_series
+    from decision_engine import generate_signal
+    outputs = [
+        [{"score": float(s)} for s in momentum_score_series(df["close"])]
+        for df in market.values()
+    ]
+    return (lambda: [generate_signal(o, "neutral") for per_asset in outputs for o in per_asset]), None
+
+
+def _bench_apply_trade_filter(market, tmp):
+    from trade_filter import apply_trade_filter
+    decision = {"signal": "BUY", "prob_up": 0.62, "confidence": 0.24}
+    items = list(market.items())
+    return (lambda: [apply_trade_filter(asset, df, decision) for asset, df in items]), None
+
+
+def _bench_run_backtest(market, tmp):
+    from backtest_engine import run_backtest
+    items = list(market.items())
+    return (lambda: [run_backtest(asset, {}, df=df, apply_filter=True) for asset, df in items]), None
+
+
+def _bench_run_optimizer(market, tmp):
+    from optimizer import run_optimizer
+    frames = [optimizer_frame(df) for df in market.values()]
+    return (lambda: [run_optimizer(f) for f in frames]), None
+
+
+def _bench_append_history(market, tmp):
+    # bestehende History mit einer Zeile pro Asset und Bar, dann ein Tageslauf anhängen
+    import forecast_tracker
+
+    names = list(market.keys())
+    n_days = len(next(iter(market.values())))
+    rng = np.random.default_rng(0)
+    ts = pd.date_range("2000-01-03 18:00", periods=n_days, freq="D").strftime("%Y-%m-%d %H:%M UTC")
+
+    history = pd.DataFrame({
+        "timestamp_utc": np.repeat(ts, len(names)),
+        "asset": np.tile(names, n_days),
+        "confidence": rng.random(n_days * len(names)).round(4),
+        "regime": "neutral",
+        "prob_up": rng.random(n_days * len(names)).round(4),
+        "score": rng.normal(0, 0.002, n_days * len(names)).round(6),
+        "signal": rng.choice(["BUY", "SELL", "HOLD"], n_days * len(names)),
+    })
+    today = history.tail(len(names)).drop(columns=["timestamp_utc"]).reset_index(drop=True)
+
+    path = os.path.join(tmp, "history.csv")
+
+    def setup():
+        forecast_tracker.HISTORY_PATH = path
+        history.to_csv(path, index=False)
+
+    # Lauf im Monat der ältesten Zeile -> misst den reinen Append (keine Kompaktierung)
+    return (lambda: forecast_tracker.append_history(today, ts[0])), setup
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "run_model": _bench_run_model,
+    "generate_signal": _bench_generate_signal,
+    "apply_trade_filter": _bench_apply_trade_filter,
+    "run_backtest": _bench_run_backtest,
+    "run_optimizer": _bench_run_optimizer,
+    "append_history": _bench_append_history,
+}
+
+
+def run_benchmarks(
+    years=DEFAULT_YEARS,
+    assets: int = DEFAULT_ASSETS,
+    freq: str = "1d",
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0,
+    only: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Returns: {"meta": {...}, "results": {"<bench>@<years>y": {wall_s, wall_median_s, peak_mb, bars, ...}}}
+    """
+    import forecast_tracker
+
+    names = only or list(BENCHMARKS)
+    results: Dict[str, Dict[str, Any]] = {}
+    history_path = forecast_tracker.HISTORY_PATH
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            for y in years:
+                market = synthetic_market(assets=assets, years=y, freq=freq, seed=seed)
+                bars = len(next(iter(market.values())))
+
+                for name in names:
+                    fn, setup = BENCHMARKS[name](market, tmp)
+                    key = f"{name}@{y:g}y"
+                    stats = measure(fn, setup=setup, repeat=repeat)
+                    stats.update({"bench": name, "years": y, "bars": bars, "assets": assets})
+                    results[key] = stats
+                    print(f"{key:<28} bars={bars:<7} wall={stats['wall_s'] * 1000:10.2f} ms  peak={stats['peak_mb']:8.2f} MB")
+        finally:
+            # History-Pfad nie verbogen zurücklassen
+            forecast_tracker.HISTORY_PATH = history_path
+
+    return {
+        "meta": {
+            "created_utc": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "freq": freq,
+            "assets": assets,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def save_baseline(report: Dict[str, Any], path: str = BASELINE_PATH) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+    print("BASELINE WRITTEN:", path)
+    return path
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Vergleicht gleiche Keys (bench@size). Returns: Liste der Regressionen
+    (wall_s oder peak_mb > baseline * (1 + threshold)).
+    """
+    regressions = []
+    base = baseline.get("results", {})
+
+    for key, cur in current.get("results", {}).items():
+        old = base.get(key)
+        if old is None:
+            print(f"{key:<28} (neu, keine Baseline)")
+            continue
+
+        row = {"key": key}
+        flags = []
+        for metric in ("wall_s", "peak_mb"):
+            ratio = cur[metric] / old[metric] if old[metric] > 0 else 1.0
+            row[f"{metric}_ratio"] = ratio
+            if ratio > 1.0 + threshold:
+                flags.append(metric)
+
+        status = "REGRESSION " + ",".join(flags) if flags else "ok"
+        print(f"{key:<28} time x{row['wall_s_ratio']:6.2f}  mem x{row['peak_mb_ratio']:6.2f}  {status}")
+
+        if flags:
+            row["metrics"] = flags
+            regressions.append(row)
+
+    return regressions
+
+
+def _parse_list(text: str, cast=float) -> Tuple:
+    return tuple(cast(x) for x in text.split(",") if x.strip())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline performance benchmark (synthetic market data)")
+    parser.add_argument("--years", default=",".join(str(y) for y in DEFAULT_YEARS), help="Datengrößen in Jahren, z.B. 1,5,10")
+    parser.add_argument("--assets", type=int, default=DEFAULT_ASSETS, help="Anzahl synthetischer Assets")
+    parser.add_argument("--freq", choices=sorted(BARS_PER_DAY), default="1d", help="Bar-Frequenz")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Wiederholungen pro Messung (Best-of)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", default=None, help=f"Nur diese Benchmarks: {','.join(BENCHMARKS)}")
+    parser.add_argument("--out", default=None, help="Ergebnis als JSON-Baseline speichern")
+    parser.add_argument("--compare", default=None, help="Gegen diese Baseline vergleichen")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Erlaubte Verschlechterung (0.25 = +25%%)")
+    args = parser.parse_args(argv)
+
+    only = _parse_list(args.only, str) if args.only else None
+    unknown = [b for b in only or [] if b not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {unknown}")
+
+    report = run_benchmarks(
+        years=_parse_list(args.years),
+        assets=args.assets,
+        freq=args.freq,
+        repeat=args.repeat,
+        seed=args.seed,
+        only=list(only) if only else None,
+    )
+
+    if args.out:
+        save_baseline(report, args.out)
+
+    if args.compare:
+        regressions = compare(report, load_baseline(args.compare), threshold=args.threshold)
+        if regressions:
+            print(f"{len(regressions)} REGRESSION(S) > {args.threshold:.0%}")
+            return 1
+        print("NO REGRESSIONS")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,3 +18,8 @@ ASSETS = {
         "ticker": "^N225"
     }
 }
+
+# Parallele Forecast-Ausführung
+FORECAST_WORKERS = 6        # Threads (1 = sequentiell)
+FORECAST_TIMEOUT_S = 90     # Deadline pro Asset in Sekunden (None = kein Limit)
+DOWNLOAD_TIMEOUT_S = 30     # Netzwerk-Timeout pro yfinance-Request
@@ -1,6 +1,19 @@
 import yfinance as yf
 import pandas as pd
 
+from config import DOWNLOAD_TIMEOUT_S
+from market_cache import read_cache, write_cache, is_fresh, merge_bars
+from price_store import has_price_store, open_price_store
+import instrumentation
+from instrumentation import span, count
+
+
+# Lookback pro Intervall (entspricht dem bisherigen yfinance "period")
+INTERVAL_PERIODS = {
+    "1d": "10y",
+    "1h": "5d",
+}
+
 
 def _flatten_columns(cols):
     """
@@ -17,44 +30,27 @@ def _flatten_columns(cols):
     return out
 
 
-def load_market_data(ticker, cfg=None):
-    print(f"Loading market data for {ticker}")
+def _normalize_frame(df):
+    """
+    Gemeinsame Normalisierung für jeden yfinance-Download:
+    UTC-naiver, sortierter Index ohne Duplikate + flache lowercase Spalten.
+    """
+    with span("data.normalize"):
+        df = df.copy()
+
+        # Normalize datetime index to avoid tz-aware vs tz-naive sorting errors
+        # -> always utc aware then convert to naive
+        df.index = pd.to_datetime(df.index, utc=True).tz_convert(None)
 
-    # Daily data (safe default for backtest AND forecast)
-    df_daily = yf.download(
-        ticker,
-        period="10y",
-        interval="1d",
-        auto_adjust=True,
-        progress=False,
-        threads=False
-    )
-
-    # Intraday data for live forecast (optional)
-    df_intraday = yf.download(
-        ticker,
-        period="5d",
-        interval="1h",
-        auto_adjust=True,
-        progress=False,
-        threads=False
-    )
-
-    if df_daily.empty and df_intraday.empty:
-        raise ValueError(f"No data returned for {ticker}")
-
-    # Combine + sort safely
-    df = pd.concat([df_daily, df_intraday], axis=0)
-
-    # Normalize datetime index to avoid tz-aware vs tz-naive sorting errors
-    # -> always utc aware then convert to naive
-    df.index = pd.to_datetime(df.index, utc=True).tz_convert(None)
-
-    df = df[~df.index.duplicated(keep="last")].sort_index()
-
-    # Normalize column names
-    df.columns = _flatten_columns(df.columns)
+        df = df[~df.index.duplicated(keep="last")].sort_index()
 
+        # Normalize column names
+        df.columns = _flatten_columns(df.columns)
+
+    return df
+
+
+def _ensure_close(df):
     # Ensure we have "close"
     # (auto_adjust=True gives close, sometimes adj close)
     if "close" not in df.columns:
@@ -64,5 +60,353 @@ def load_market_data(ticker, cfg=None):
             df["close"] = df["price"]
         else:
             raise KeyError(f"'close' not found in columns: {df.columns.tolist()}")
+    return df
+
+
+def _trim_to_period(df, interval):
+    """
+    Cache wächst durch Delta-Merges über den Lookback hinaus ->
+    auf das gleiche Fenster wie ein frischer Download kürzen.
+    """
+    if df.empty:
+        return df
+
+    if interval == "1h":
+        # period="5d" = die letzten 5 Handelstage
+        days = df.index.normalize().unique()[-5:]
+        return df[df.index.normalize().isin(days)]
+
+    period = INTERVAL_PERIODS.get(interval, "10y")
+    if period.endswith("y"):
+        cutoff = df.index[-1] - pd.DateOffset(years=int(period[:-1]))
+        return df[df.index >= cutoff]
 
     return df
+
+
+def _count_download(raw):
+    # yfinance gibt keine Wire-Bytes heraus -> Größe des geladenen Frames
+    if not instrumentation.ENABLED:
+        return
+    count("download_requests")
+    if raw is not None:
+        count("download_bars", len(raw))
+        count("download_bytes", int(raw.memory_usage(deep=True).sum()))
+
+
+def _download(ticker, interval, start=None):
+    kwargs = {"start": start} if start is not None else {"period": INTERVAL_PERIODS.get(interval, "10y")}
+
+    with span("data.download"):
+        raw = yf.download(
+            ticker,
+            interval=interval,
+            auto_adjust=True,
+            progress=False,
+            threads=False,
+            timeout=DOWNLOAD_TIMEOUT_S,
+            **kwargs
+        )
+    _count_download(raw)
+
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+    return _normalize_frame(raw)
+
+
+def load_interval(ticker, interval, use_cache=True, refresh=False):
+    """
+    Lädt ein einzelnes Intervall über den lokalen Cache:
+    - frischer Cache        -> kein Netzwerkzugriff
+    - veralteter Cache      -> nur Bars ab dem letzten Zeitstempel nachladen + mergen
+    - kein Cache / refresh  -> voller Download
+    """
+    cached = read_cache(ticker, interval) if (use_cache and not refresh) else None
+
+    if cached is not None and not cached.empty and is_fresh(ticker, interval):
+        count("cache_hits")
+        return cached
+
+    start = None
+    if cached is not None and not cached.empty:
+        # letzten Bar erneut holen (kann unvollständig gewesen sein)
+        start = cached.index[-1].normalize() if interval == "1d" else cached.index[-1]
+
+    try:
+        fresh = _download(ticker, interval, start=start)
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"WARNING {ticker} {interval}: refresh failed, using cache ({e})")
+        return cached
+
+    df = _trim_to_period(merge_bars(cached, fresh), interval)
+
+    if use_cache and not df.empty:
+        write_cache(ticker, interval, df)
+
+    return df
+
+
+# =========================
+# Multi-Timeframe Container
+# =========================
+def _session_dates(index, intraday=False):
+    """
+    Handelstag je Bar.
+    Daily-Bars liegen auf lokaler Mitternacht der Börse (in UTC z.B. 23:00 Vortag
+    für Frankfurt, 05:00 für New York, 15:00 Vortag für Tokio) -> auf nächste
+    UTC-Mitternacht runden. Intraday-Bars liegen innerhalb des UTC-Tages.
+    """
+    if intraday:
+        return index.floor("D")
+    return index.round("D")
+
+
+class MarketData:
+    """
+    Getrennte Frames pro Intervall für einen Ticker.
+
+    - Jedes Intervall wird erst beim ersten Zugriff geladen (Cache/yfinance).
+    - live_daily(): Daily-Historie + noch nicht abgeschlossene Handelstage aus
+      den Intraday-Bars, einmalig auf Daily-OHLCV resampled.
+    - store_dir: Intervalle, die im memmap price_store liegen, werden als
+      read-only View von dort gelesen (kein Netzwerk, keine Kopie).
+    """
+
+    def __init__(self, ticker, intervals=("1d", "1h"), use_cache=True, refresh=False, frames=None, store_dir=None):
+        self.ticker = ticker
+        self.intervals = tuple(intervals)
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.store_dir = store_dir
+        self._frames = dict(frames or {})
+        self._live_daily = None
+
+    def frame(self, interval):
+        if interval not in self._frames:
+            if self.store_dir and has_price_store(self.ticker, interval, self.store_dir):
+                self._frames[interval] = open_price_store(self.ticker, interval, self.store_dir)
+            else:
+                self._frames[interval] = load_interval(
+                    self.ticker, interval, use_cache=self.use_cache, refresh=self.refresh
+                )
+        return self._frames[interval]
+
+    @property
+    def daily(self):
+        return self.frame("1d")
+
+    @property
+    def intraday(self):
+        return self.frame("1h")
+
+    def live_daily(self):
+        if self._live_daily is not None:
+            return self._live_daily
+
+        daily = self.daily
+        intraday = self.intraday if "1h" in self.intervals else pd.DataFrame()
+
+        if daily.empty and intraday.empty:
+            raise ValueError(f"No data returned for {self.ticker}")
+
+        if intraday.empty:
+            self._live_daily = _ensure_close(daily)
+            return self._live_daily
+        if daily.empty:
+            self._live_daily = _ensure_close(intraday)
+            return self._live_daily
+
+        # nur Handelstage, die es als Daily-Bar noch nicht gibt
+        intraday = _ensure_close(intraday.copy())
+        sessions = _session_dates(intraday.index, intraday=True)
+        new = intraday[~sessions.isin(_session_dates(daily.index))]
+
+        if new.empty:
+            self._live_daily = _ensure_close(daily)
+            return self._live_daily
+
+        agg = {c: "last" for c in new.columns}
+        agg.update({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+        agg = {c: f for c, f in agg.items() if c in new.columns}
+        partial = new.groupby(_session_dates(new.index, intraday=True)).agg(agg)
+
+        # gleiche Label-Konvention wie die Daily-Bars (lokale Mitternacht in UTC)
+        last = daily.index[-1]
+        partial.index = partial.index + (last - last.round("D"))
+        partial = partial[daily.columns.intersection(partial.columns)]
+
+        df = pd.concat([daily, partial], axis=0)
+        df = df[~df.index.duplicated(keep="first")].sort_index()
+        self._live_daily = _ensure_close(df)
+        return self._live_daily
+
+    def to_frame(self):
+        """
+        Ein Frame je nach angefragten Intervallen:
+        nur "1d" -> Daily, nur "1h" -> Intraday, beide -> live_daily().
+        """
+        if "1d" in self.intervals and "1h" in self.intervals:
+            return self.live_daily()
+        if "1d" in self.intervals:
+            if self.daily.empty:
+                raise ValueError(f"No data returned for {self.ticker}")
+            return _ensure_close(self.daily)
+        if self.intraday.empty:
+            raise ValueError(f"No data returned for {self.ticker}")
+        return _ensure_close(self.intraday)
+
+
+def load_timeframes(ticker, intervals=("1d", "1h"), use_cache=True, refresh=False, store_dir=None):
+    return MarketData(ticker, intervals=intervals, use_cache=use_cache, refresh=refresh, store_dir=store_dir)
+
+
+def load_market_data(ticker, cfg=None, intervals=("1d", "1h"), use_cache=True, refresh=False, store_dir=None):
+    """
+    intervals=("1d",)        -> nur Daily (Backtests, kein Intraday-Request)
+    intervals=("1d", "1h")   -> Daily + laufender Handelstag aus Intraday (Live)
+    store_dir                -> memmap price_store (read-only View, z.B. für Prozess-Pools)
+    """
+    print(f"Loading market data for {ticker}")
+
+    md = load_timeframes(ticker, intervals, use_cache=use_cache, refresh=refresh, store_dir=store_dir)
+    return md.to_frame()
+
+
+# =========================
+# Bulk: ganzes Universum in einem Request pro Intervall
+# =========================
+def _split_bulk(raw, ticker):
+    """
+    yf.download(group_by="ticker") liefert Spalten (ticker, field).
+    Zeilen, in denen der Ticker keine Daten hat (andere Börsenfeiertage), fallen weg.
+    """
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+
+    cols = raw.columns
+    if isinstance(cols, pd.MultiIndex):
+        if ticker in cols.get_level_values(0):
+            part = raw[ticker]
+        elif ticker in cols.get_level_values(1):
+            part = raw.xs(ticker, axis=1, level=1)
+        else:
+            return pd.DataFrame()
+    else:
+        part = raw
+
+    part = part.dropna(how="all")
+    if part.empty:
+        return pd.DataFrame()
+    return _normalize_frame(part)
+
+
+def _download_bulk(tickers, interval, start=None):
+    kwargs = {"start": start} if start is not None else {"period": INTERVAL_PERIODS.get(interval, "10y")}
+
+    with span("data.download_bulk"):
+        raw = yf.download(
+            list(tickers),
+            interval=interval,
+            auto_adjust=True,
+            progress=False,
+            threads=True,
+            timeout=DOWNLOAD_TIMEOUT_S,
+            group_by="ticker",
+            **kwargs
+        )
+    _count_download(raw)
+    return raw
+
+
+def load_interval_bulk(tickers, interval, use_cache=True, refresh=False):
+    """
+    Wie load_interval, aber für viele Ticker: alle nicht frischen Ticker
+    werden in EINEM yfinance-Request geladen.
+
+    Returns: (frames, errors) – dicts ticker -> DataFrame / Fehlertext
+    """
+    frames = {}
+    errors = {}
+    cached = {}
+
+    for t in tickers:
+        c = read_cache(t, interval) if (use_cache and not refresh) else None
+        if c is not None and not c.empty and is_fresh(t, interval):
+            count("cache_hits")
+            frames[t] = c
+        else:
+            cached[t] = c
+
+    if not cached:
+        return frames, errors
+
+    # ein Request: ohne Cache voller Lookback, sonst ab dem ältesten letzten Bar
+    start = None
+    if all(c is not None and not c.empty for c in cached.values()):
+        last = min(c.index[-1] for c in cached.values())
+        start = last.normalize() if interval == "1d" else last
+
+    try:
+        raw = _download_bulk(cached.keys(), interval, start=start)
+    except Exception as e:
+        raw = None
+        print(f"WARNING bulk {interval} download failed: {e}")
+
+    for t, c in cached.items():
+        try:
+            fresh = _split_bulk(raw, t)
+            if fresh.empty and (c is None or c.empty):
+                errors[t] = f"No {interval} data returned for {t}"
+                frames[t] = pd.DataFrame()
+                continue
+
+            df = _trim_to_period(merge_bars(c, fresh), interval)
+            # wie load_interval: nach erfolgreichem Request immer schreiben (auch ohne neue
+            # Bars, z.B. Wochenende) -> mtime = Refresh, spätere Läufe laden nicht erneut
+            if use_cache and raw is not None and not df.empty:
+                write_cache(t, interval, df)
+            frames[t] = df
+        except Exception as e:
+            errors[t] = str(e)
+            frames[t] = pd.DataFrame()
+
+    return frames, errors
+
+
+def load_market_data_bulk(assets, intervals=("1d", "1h"), use_cache=True, refresh=False):
+    """
+    Lädt alle Assets aus ASSETS-Config (name -> {"ticker": ...}) gebündelt.
+
+    Returns: (data, errors)
+      data   : asset -> normalisierter DataFrame (wie load_market_data)
+      errors : asset -> Fehlertext (andere Assets laufen trotzdem weiter)
+    """
+    tickers = list(dict.fromkeys(cfg["ticker"] for cfg in assets.values()))
+    print(f"Loading market data for {len(tickers)} tickers (bulk)")
+
+    frames = {}
+    interval_errors = {}
+    for interval in intervals:
+        frames[interval], interval_errors[interval] = load_interval_bulk(
+            tickers, interval, use_cache=use_cache, refresh=refresh
+        )
+
+    data = {}
+    errors = {}
+    for asset, cfg in assets.items():
+        t = cfg["ticker"]
+        md = MarketData(
+            t,
+            intervals=intervals,
+            use_cache=use_cache,
+            refresh=refresh,
+            frames={i: frames[i].get(t, pd.DataFrame()) for i in intervals},
+        )
+        try:
+            data[asset] = md.to_frame()
+        except Exception as e:
+            errors[asset] = interval_errors[intervals[0]].get(t, str(e))
+
+    return data, errors
@@ -14,6 +14,13 @@ from __future__ import annotations
 import math
 from typing import Dict, Any
 
+import numpy as np
+
+
+# Basissignal-Schwellen (Trade Filter entscheidet final!)
+BUY_THRESHOLD = 0.55
+SELL_THRESHOLD = 0.45
+
 
 def _clamp(x: float, lo: float = 0.0, hi: float = 1.0) -> float:
     return max(lo, min(hi, x))
@@ -31,6 +38,32 @@ def score_to_prob_up(score: float, scale: float = 150.0) -> float:
     return _clamp(0.5 + 0.5 * x)
 
 
+def score_to_prob_up_array(scores, scale: float = 150.0) -> np.ndarray:
+    """
+    Vektorisierte Variante von score_to_prob_up.
+    Nutzt bewusst math.tanh statt np.tanh: np.tanh weicht im letzten Bit ab,
+    das Ergebnis soll aber bit-identisch zum Einzel-Aufruf sein.
+    """
+    scores = np.asarray(scores, dtype=float)
+    x = np.fromiter((math.tanh(s * scale) for s in scores.tolist()), dtype=float, count=len(scores))
+    return np.clip(0.5 + 0.5 * x, 0.0, 1.0)
+
+
+def generate_signal_arrays(scores, scale: float = 150.0) -> Dict[str, np.ndarray]:
+    """
+    generate_signal für eine ganze Score-Serie (ungerundet).
+    """
+    prob_up = score_to_prob_up_array(scores, scale)
+    signal = np.where(prob_up >= BUY_THRESHOLD, "BUY", np.where(prob_up <= SELL_THRESHOLD, "SELL", "HOLD"))
+
+    return {
+        "signal": signal.astype(object),
+        "confidence": np.abs(prob_up - 0.5) * 2.0,
+        "prob_up": prob_up,
+        "prob_down": 1.0 - prob_up,
+    }
+
+
 def generate_signal(model_output: Dict[str, Any], regime: str) -> Dict[str, Any]:
     score = float(model_output.get("score", 0.0))
 
@@ -41,9 +74,9 @@ def generate_signal(model_output: Dict[str, Any], regime: str) -> Dict[str, Any]
     confidence = abs(prob_up - 0.5) * 2.0  # 0..1
 
     # Basissignal (Trade Filter entscheidet final!)
-    if prob_up >= 0.55:
+    if prob_up >= BUY_THRESHOLD:
         signal = "BUY"
-    elif prob_up <= 0.45:
+    elif prob_up <= SELL_THRESHOLD:
         signal = "SELL"
     else:
         signal = "HOLD"
@@ -0,0 +1,316 @@
+"""Equivalence checks (offline, synthetische Kursdaten)
+
+Die schnellen Pfade müssen exakt dieselben Ergebnisse liefern wie ihre
+Referenz-Implementierung. Jeder Check vergleicht beide auf geseedeten
+OHLCV-Serien (benchmark.synthetic_ohlcv) und meldet die erste Abweichung:
+
+    backtest_vectorized   run_backtest        == run_backtest_loop
+    momentum_state        MomentumState.score == run_model(Prefix) pro Bar (inkl. snapshot/restore)
+                          run_backtest_streaming == run_backtest
+    backtest_sharded      run_backtest_sharded (Prozess-Pool, mit Filter + Horizonten) == run_backtest
+    trade_filter_batch    apply_trade_filter_batch Zeile k == apply_trade_filter(df.iloc[:k + 1])
+    adaptive_objective    AssetObjective.evaluate (volle Historie) == run_backtest(apply_filter=True)
+                          mit denselben Filter-Parametern (trades, winrate, avg_return)
+    parameter_sweep       parameter_sweep.run_sweep (Broadcasting, kleine Blöcke) == AssetObjective.evaluate
+                          (auch andere scales) und == run_backtest(apply_filter=True) für scale 150:
+                          trades, buys, sells, winrate exakt, avg_return bis auf Rundung
+    optimizer_grid        grid_stats (Masken-Algebra, kleine Blöcke) == apply_filters/evaluate_strategy
+                          pro Config: trades, winrate und gewählte Config exakt, Rendite-Summen bis
+                          auf Rundung (andere Summationsreihenfolge)
+    executor_deadline     run_concurrent mit mehr Assets als Workern, alle Worker hängen:
+                          jedes Asset bekommt seine Zeile (HOLD/TIMEOUT) in begrenzter Zeit
+
+    python equivalence_check.py --seeds 3 --bars 400
+    python equivalence_check.py --only backtest_vectorized
+
+Exit-Code 1, sobald ein Check abweicht.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from benchmark import optimizer_frame, synthetic_ohlcv
+import adaptive_optimizer
+import backtest_engine
+import forecast_executor
+import optimizer
+import parameter_sweep
+from model_core import MomentumState, run_model
+from trade_filter import FILTER_PARAMS, apply_trade_filter, apply_trade_filter_batch
+
+
+DEFAULT_SEEDS = 3
+DEFAULT_BARS = 400
+
+# Asset mit FILTER_PARAMS (Filter-Checks)
+CHECK_ASSET = "DAX"
+
+# Mindestlänge pro Check: Grenzfälle (prob_up exakt auf der Schwelle) brauchen lange Serien,
+# die vektorisierten Checks sind dafür billig genug
+CHECK_MIN_BARS = {"adaptive_objective": 2520, "parameter_sweep": 2520, "optimizer_grid": 1500}
+
+# Rendite-Summen (Matmul/Summe vs. pandas/mean) dürfen nur im Rundungsrauschen abweichen
+SUM_RTOL = 1e-12
+
+
+def first_difference(expected: Sequence[Dict[str, Any]], actual: Sequence[Dict[str, Any]]) -> Optional[str]:
+    """Erste abweichende Zeile/Spalte zweier Record-Listen (None = identisch)."""
+    if len(expected) != len(actual):
+        return f"{len(actual)} rows, expected {len(expected)}"
+    for i, (e, a) in enumerate(zip(expected, actual)):
+        for key in e:
+            if key not in a:
+                return f"row {i}: column {key} missing"
+            if e[key] != a[key] and not (pd.isna(e[key]) and pd.isna(a[key])):
+                return f"row {i} ({e.get('date')}): {key} = {a[key]!r}, expected {e[key]!r}"
+    return None
+
+
+def _check_backtest_vectorized(df: pd.DataFrame) -> Optional[str]:
+    expected = backtest_engine.run_backtest_loop(CHECK_ASSET, {}, df=df)
+    actual = backtest_engine.run_backtest(CHECK_ASSET, {}, df=df).to_records()
+    return first_difference(expected, actual)
+
+
+def _check_momentum_state(df: pd.DataFrame) -> Optional[str]:
+    close = df["close"].to_numpy(dtype=float)
+    state = MomentumState()
+    for k, c in enumerate(close):
+        if k == len(close) // 2:
+            # Zustand über JSON-Snapshot weitergeben
+            state = MomentumState.restore(json.loads(json.dumps(state.snapshot())))
+        score = state.update(c)
+        expected = run_model(df.iloc[:k + 1])["score"]
+        if score != expected:
+            return f"bar {k}: score = {score!r}, expected {expected!r}"
+
+    expected = backtest_engine.run_backtest(CHECK_ASSET, {}, df=df).to_records()
+    return first_difference(expected, backtest_engine.run_backtest_streaming(CHECK_ASSET, {}, df=df))
+
+
+def _check_backtest_sharded(df: pd.DataFrame) -> Optional[str]:
+    kwargs = {"df": df, "apply_filter": True, "horizons": [1, 3, 10]}
+    expected = backtest_engine.run_backtest(CHECK_ASSET, {}, **kwargs).to_records()
+    for workers in (1, 2):
+        actual = backtest_engine.run_backtest_sharded(CHECK_ASSET, {}, shards=4, workers=workers, **kwargs).to_records()
+        diff = first_difference(expected, actual)
+        if diff is not None:
+            return f"workers={workers}: {diff}"
+    return None
+
+
+def _check_trade_filter_batch(df: pd.DataFrame) -> Optional[str]:
+    params = FILTER_PARAMS[CHECK_ASSET]
+    # gerundete prob_up wie live, dazu exakt die Schwellen (Grenzfälle >= / <=)
+    rng = np.random.default_rng(len(df))
+    prob_up = rng.uniform(0.35, 0.65, len(df)).round(4)
+    prob_up[::7] = params["long_th"]
+    prob_up[3::7] = params["short_th"]
+
+    batch = apply_trade_filter_batch(CHECK_ASSET, df, prob_up)
+    expected = [
+        {key: row[key] for key in ("final_signal", "rule")}
+        for row in (apply_trade_filter(CHECK_ASSET, df.iloc[:k + 1], {"prob_up": p}) for k, p in enumerate(prob_up.tolist()))
+    ]
+    return first_difference(expected, batch[["final_signal", "rule"]].to_dict("records"))
+
+
+@contextlib.contextmanager
+def _filter_params(asset: str, params: Dict[str, Any]):
+    # run_backtest liest FILTER_PARAMS[asset] -> für den Vergleich kurz ersetzen
+    old = FILTER_PARAMS.get(asset)
+    FILTER_PARAMS[asset] = {k: params[k] for k in old}
+    try:
+        yield
+    finally:
+        FILTER_PARAMS[asset] = old
+
+
+def _backtest_stats(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    # Referenz: run_backtest(apply_filter=True) mit diesen Filter-Parametern (scale 150)
+    with _filter_params(CHECK_ASSET, params):
+        bt = backtest_engine.run_backtest(CHECK_ASSET, {}, df=df, apply_filter=True).to_frame()
+    side = np.where(bt["final_signal"] == "BUY", 1.0, np.where(bt["final_signal"] == "SELL", -1.0, 0.0))
+    traded = side != 0
+    signed = side[traded] * bt["future_return"].to_numpy()[traded]
+    return {
+        "trades": int(traded.sum()),
+        "buys": int((side == 1).sum()),
+        "sells": int((side == -1).sum()),
+        "winrate": float((signed > 0).sum()) / traded.sum() if traded.any() else float("nan"),
+        "avg_return": float(signed.mean()) if traded.any() else float("nan"),
+    }
+
+
+def _check_adaptive_objective(df: pd.DataFrame) -> Optional[str]:
+    objective = adaptive_optimizer.AssetObjective(CHECK_ASSET, df)
+    rng = np.random.default_rng(len(df))
+    # run_backtest rechnet mit scale 150 -> nur die Filter-Parameter variieren
+    configs = [adaptive_optimizer.current_params(CHECK_ASSET)]
+    configs += [{**p, "scale": adaptive_optimizer.DEFAULT_SCALE} for p in adaptive_optimizer.sample_params(rng, 12)]
+
+    for i, params in enumerate(configs):
+        stats = _backtest_stats(df, params)
+        expected = {k: stats[k] for k in ("trades", "winrate", "avg_return")}
+        actual = objective.evaluate(params, 1.0)
+        diff = first_difference([expected], [actual])
+        if diff is not None:
+            return f"config {i} {params}: {diff}"
+    return None
+
+
+def _sweep_difference(expected: Dict[str, Any], actual: Dict[str, Any]) -> Optional[str]:
+    # Zähler exakt, avg_return (mean vs. Summe / trades) bis auf Rundung
+    exact = {k: v for k, v in expected.items() if k != "avg_return"}
+    diff = first_difference([exact], [actual])
+    if diff is not None:
+        return diff
+    e, a = expected["avg_return"], actual["avg_return"]
+    if not (pd.isna(e) and pd.isna(a)) and not np.isclose(a, e, rtol=SUM_RTOL, atol=0.0):
+        return f"avg_return = {a!r}, expected {e!r}"
+    return None
+
+
+def _check_parameter_sweep(df: pd.DataFrame) -> Optional[str]:
+    objective = adaptive_optimizer.AssetObjective(CHECK_ASSET, df)
+    rng = np.random.default_rng(len(df))
+    # gesampelte Sätze variieren auch scale (nur gegen AssetObjective), die scale-150-Sätze zusätzlich gegen run_backtest
+    sampled = adaptive_optimizer.sample_params(rng, 8)
+    at_default = [adaptive_optimizer.current_params(CHECK_ASSET)]
+    at_default += [{**p, "scale": adaptive_optimizer.DEFAULT_SCALE} for p in sampled[:4]]
+    configs = at_default + sampled
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        swept = parameter_sweep.run_sweep(
+            parameter_sweep.SweepData(CHECK_ASSET, df), pd.DataFrame(configs)[parameter_sweep.PARAM_COLUMNS], chunk=3
+        ).to_dict("records")
+
+    for i, (params, actual) in enumerate(zip(configs, swept)):
+        expected = objective.evaluate(params, 1.0)
+        diff = _sweep_difference({k: expected[k] for k in ("trades", "winrate", "avg_return")}, actual)
+        if diff is None and i < len(at_default):
+            diff = _sweep_difference(_backtest_stats(df, params), actual)
+        if diff is not None:
+            return f"config {i} {params}: {diff}"
+    return None
+
+
+def _check_optimizer_grid(df: pd.DataFrame) -> Optional[str]:
+    data = optimizer_frame(df)
+    grid = optimizer.DEFAULT_GRID
+    # kleiner Block -> auch die Blockgrenzen von config_sums werden geprüft
+    stats = optimizer.grid_stats(data, grid, chunk=7).to_dict("records")
+    configs = optimizer.grid_configs(grid)
+
+    best_id, best_winrate = None, None
+    for i, (cfg, row) in enumerate(zip(configs, stats)):
+        filtered = optimizer.apply_filters(data, cfg)
+        expected = optimizer.evaluate_strategy(filtered)
+        if len(filtered) != row["trades"]:
+            return f"config {i} {cfg}: trades = {row['trades']}, expected {len(filtered)}"
+        if expected is None:
+            continue
+        if expected["winrate"] != row["winrate"]:
+            return f"config {i} {cfg}: winrate = {row['winrate']!r}, expected {expected['winrate']!r}"
+        for key in ("avg_return", "profit_factor"):
+            if not np.isclose(row[key], expected[key], rtol=SUM_RTOL, atol=0.0):
+                return f"config {i} {cfg}: {key} = {row[key]!r}, expected {expected[key]!r}"
+        # Referenz-Auswahl: erste Config mit maximaler Winrate (>= MIN_TRADES)
+        if expected["trades"] >= optimizer.MIN_TRADES and (best_winrate is None or expected["winrate"] > best_winrate):
+            best_id, best_winrate = i, expected["winrate"]
+
+    best = optimizer.select_best(pd.DataFrame(stats))
+    actual_id = None if best is None else int(best["config_id"])
+    if actual_id != best_id:
+        return f"select_best = config {actual_id}, expected {best_id}"
+    return None
+
+
+def _check_executor_deadline(df: pd.DataFrame) -> Optional[str]:
+    timeout_s = 0.2
+    hung = ["A", "B", "C"]
+    release = threading.Event()
+
+    def fn(asset, cfg):
+        if asset in hung:
+            release.wait()
+        return {"asset": asset, "rule": "ok", "close": float(df["close"].iloc[-1])}
+
+    assets = {a: {} for a in hung + ["D", "E"]}
+    t0 = time.monotonic()
+    try:
+        results = forecast_executor.run_concurrent(assets, fn, max_workers=2, timeout_s=timeout_s)
+    finally:
+        release.set()
+    elapsed = time.monotonic() - t0
+
+    # 3 hängende Assets bei 2 Workern: höchstens 2 Deadline-Runden (+ Reserve)
+    if elapsed > 4 * timeout_s + 1.0:
+        return f"run_concurrent took {elapsed:.2f}s"
+    timeout_rule = forecast_executor.timeout_row("", timeout_s)["rule"]
+    expected = [{"asset": a, "rule": timeout_rule if a in hung else "ok"} for a in assets]
+    return first_difference(expected, results)
+
+
+CHECKS: Dict[str, Callable[[pd.DataFrame], Optional[str]]] = {
+    "backtest_vectorized": _check_backtest_vectorized,
+    "momentum_state": _check_momentum_state,
+    "backtest_sharded": _check_backtest_sharded,
+    "trade_filter_batch": _check_trade_filter_batch,
+    "adaptive_objective": _check_adaptive_objective,
+    "parameter_sweep": _check_parameter_sweep,
+    "optimizer_grid": _check_optimizer_grid,
+    "executor_deadline": _check_executor_deadline,
+}
+
+
+def run_checks(seeds: int = DEFAULT_SEEDS, bars: int = DEFAULT_BARS, only: Optional[List[str]] = None) -> List[str]:
+    """Returns: Liste der Abweichungen ("name seed=k: ...")."""
+    failures = []
+    for name, check in CHECKS.items():
+        if only and name not in only:
+            continue
+        for seed in range(seeds):
+            df = synthetic_ohlcv(max(bars, CHECK_MIN_BARS.get(name, 0)), seed=seed)
+            with contextlib.redirect_stdout(io.StringIO()):
+                diff = check(df)
+            status = "OK" if diff is None else f"MISMATCH {diff}"
+            print(f"{name:<22} seed={seed}  {status}")
+            if diff is not None:
+                failures.append(f"{name} seed={seed}: {diff}")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Equivalence checks of fast paths vs. reference implementations")
+    parser.add_argument("--seeds", type=int, default=DEFAULT_SEEDS, help="Anzahl synthetischer Serien")
+    parser.add_argument("--bars", type=int, default=DEFAULT_BARS, help="Bars pro Serie")
+    parser.add_argument("--only", default=None, help=f"Nur diese Checks: {','.join(CHECKS)}")
+    args = parser.parse_args(argv)
+
+    only = [x for x in args.only.split(",") if x.strip()] if args.only else None
+    unknown = [c for c in only or [] if c not in CHECKS]
+    if unknown:
+        parser.error(f"unknown check(s): {unknown}")
+
+    failures = run_checks(seeds=args.seeds, bars=args.bars, only=only)
+    if failures:
+        print(f"{len(failures)} MISMATCH(ES)")
+        return 1
+    print("ALL CHECKS PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,18 +2,26 @@ from data_loader import load_market_data
 from model_core import run_model
 from decision_engine import generate_signal
 from regime_adjustment import adjust_for_regime
+from instrumentation import span, count
 
 
-def forecast_asset(asset_name, asset_cfg, df_override=None):
+def forecast_asset(asset_name, asset_cfg, df_override=None, model_state=None):
     # Backtest Slice oder Live Daten
     if df_override is not None:
         df = df_override
     else:
-        df = load_market_data(asset_cfg["ticker"], asset_cfg)
+        with span("forecast.load"):
+            df = load_market_data(asset_cfg["ticker"], asset_cfg)
 
-    model_output = run_model(df)
-    regime = adjust_for_regime(df)
-    decision = generate_signal(model_output, regime)
+    count("bars_processed", len(df))
+
+    # model_state: MomentumState, bereits bis zum letzten Bar von df fortgeschrieben
+    with span("forecast.run_model"):
+        model_output = model_state.model_output() if model_state is not None else run_model(df)
+    with span("forecast.adjust_for_regime"):
+        regime = adjust_for_regime(df)
+    with span("forecast.generate_signal"):
+        decision = generate_signal(model_output, regime)
 
     # Pflicht: close muss existieren (data_loader normalisiert)
     latest_close = float(df["close"].iloc[-1])
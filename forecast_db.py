@@ -0,0 +1,389 @@
+"""Forecast-Datenbank (SQLite, eine Datei: forecasts/forecasts.db)
+
+Tabellen:
+    runs         run_ts_utc (PK), date_utc, n_assets, source
+    forecasts    ein Forecast pro (asset, timestamp_utc), Index (asset, timestamp_utc) + timestamp_utc
+    validations  ein Eintrag pro (asset, date_utc) aus validate_yesterday
+
+main.py schreibt jeden Lauf mit (record_run). Bestehende Dateien unter forecasts/
+(history.csv + Monats-Partitionen, daily_index_forecast.csv, daily/*.json,
+history/all_forecasts.json, txt/*.txt, validation.csv) importiert:
+
+    python forecast_db.py --migrate
+
+Quellen nur mit Datum (daily/*.json, txt) werden nur übernommen, wenn für
+(asset, Tag) noch kein Forecast existiert -> kein doppelter Lauf. Der Import ist idempotent.
+
+Die DB ist nicht im Repo (.gitignore): CSV/JSON bleiben die Quelle, der Daily-Job
+hält forecasts.db im Actions-Cache und ergänzt sie vor jedem Lauf per --migrate.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+
+DB_PATH = "forecasts/forecasts.db"
+
+FORECAST_COLUMNS = [
+    "timestamp_utc",
+    "date_utc",
+    "asset",
+    "signal",
+    "prob_up",
+    "confidence",
+    "regime",
+    "prev_close",
+    "close",
+    "daily_return",
+    "score",
+    "rule",
+    "source",
+    "extra",
+]
+
+VALIDATION_COLUMNS = [
+    "date_utc",
+    "asset",
+    "yesterday_signal",
+    "yesterday_prob_up",
+    "yesterday_confidence",
+    "today_return_pct",
+    "hit_1d",
+]
+
+# ältere History-Schemata -> aktuelle Spaltennamen
+LEGACY_COLUMNS = {
+    "signal_final": "signal",
+    "price_current": "close",
+    "current": "close",
+    "price_prev_close": "prev_close",
+    "return_daily_pct": "daily_return",
+    "rule_label": "rule",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_ts_utc TEXT PRIMARY KEY,
+    date_utc   TEXT NOT NULL,
+    n_assets   INTEGER,
+    source     TEXT
+);
+CREATE TABLE IF NOT EXISTS forecasts (
+    timestamp_utc TEXT NOT NULL,
+    date_utc      TEXT NOT NULL,
+    asset         TEXT NOT NULL,
+    signal        TEXT,
+    prob_up       REAL,
+    confidence    REAL,
+    regime        TEXT,
+    prev_close    REAL,
+    close         REAL,
+    daily_return  REAL,
+    score         REAL,
+    rule          TEXT,
+    source        TEXT,
+    extra         TEXT,
+    UNIQUE (asset, timestamp_utc)  -- zugleich Index (asset, timestamp_utc)
+);
+CREATE INDEX IF NOT EXISTS forecasts_timestamp ON forecasts (timestamp_utc);
+CREATE TABLE IF NOT EXISTS validations (
+    date_utc             TEXT NOT NULL,
+    asset                TEXT NOT NULL,
+    yesterday_signal     TEXT,
+    yesterday_prob_up    REAL,
+    yesterday_confidence REAL,
+    today_return_pct     REAL,
+    hit_1d               INTEGER,
+    PRIMARY KEY (asset, date_utc)
+);
+"""
+
+
+@contextmanager
+def connect(db_path: str = DB_PATH):
+    """Verbindung mit angelegtem Schema; commit am Ende, rollback bei Fehler."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# =========================
+# Schreiben
+# =========================
+def _normalize(df: pd.DataFrame, source: str, run_ts_utc: Optional[str] = None) -> pd.DataFrame:
+    df = df.copy()
+    if run_ts_utc is not None:
+        df["timestamp_utc"] = run_ts_utc
+
+    for old, new in LEGACY_COLUMNS.items():
+        if old not in df.columns:
+            continue
+        df[new] = df[old] if new not in df.columns else df[new].fillna(df[old])
+        df = df.drop(columns=old)
+
+    df = df.dropna(subset=["asset", "timestamp_utc"])
+    df["timestamp_utc"] = df["timestamp_utc"].astype(str)
+    df["date_utc"] = df["timestamp_utc"].str[:10]
+    df["source"] = source
+
+    # alles Übrige als JSON (nur gesetzte Werte)
+    rest = [c for c in df.columns if c not in FORECAST_COLUMNS]
+    extra = [{k: v for k, v in rec.items() if pd.notna(v)} for rec in df[rest].to_dict("records")] if rest else []
+    df["extra"] = [json.dumps(e, default=str) if e else None for e in extra] if rest else None
+
+    df = df.reindex(columns=FORECAST_COLUMNS)
+    return df.astype(object).where(df.notna(), None)
+
+
+def _insert_forecasts(conn, df: pd.DataFrame, date_only: bool = False) -> int:
+    if df.empty:
+        return 0
+    cols = ", ".join(FORECAST_COLUMNS)
+    marks = ", ".join("?" * len(FORECAST_COLUMNS))
+    rows = list(df.itertuples(index=False, name=None))
+    before = conn.total_changes
+    if date_only:
+        # nur Datum bekannt: nicht neben einem echten Lauf desselben Tages einfügen
+        conn.executemany(
+            f"INSERT INTO forecasts ({cols}) SELECT {marks} "
+            "WHERE NOT EXISTS (SELECT 1 FROM forecasts WHERE asset = ? AND date_utc = ?)",
+            [r + (r[2], r[1]) for r in rows],
+        )
+    else:
+        conn.executemany(f"INSERT OR IGNORE INTO forecasts ({cols}) VALUES ({marks})", rows)
+    added = conn.total_changes - before
+
+    # runs aus dem, was tatsächlich in forecasts steht (übersprungene Datums-Quellen erzeugen keinen Lauf)
+    conn.executemany(
+        "INSERT OR REPLACE INTO runs (run_ts_utc, date_utc, n_assets, source) "
+        "SELECT timestamp_utc, date_utc, COUNT(*), MIN(source) FROM forecasts WHERE timestamp_utc = ? GROUP BY timestamp_utc",
+        [(ts,) for ts in df["timestamp_utc"].unique()],
+    )
+    return added
+
+
+def _insert_validations(conn, validation: pd.DataFrame) -> int:
+    if validation is None or validation.empty:
+        return 0
+    v = validation.reindex(columns=VALIDATION_COLUMNS)
+    v = v.astype(object).where(v.notna(), None)
+    cols = ", ".join(VALIDATION_COLUMNS)
+    before = conn.total_changes
+    conn.executemany(
+        f"INSERT OR REPLACE INTO validations ({cols}) VALUES ({', '.join('?' * len(VALIDATION_COLUMNS))})",
+        list(v.itertuples(index=False, name=None)),
+    )
+    return conn.total_changes - before
+
+
+def record_run(df_today: pd.DataFrame, run_ts_utc: str, validation: Optional[pd.DataFrame] = None,
+               db_path: str = DB_PATH) -> int:
+    """Forecasts eines Laufs (+ optional die Validierung von gestern) speichern. Returns: neue Forecasts"""
+    with connect(db_path) as conn:
+        added = _insert_forecasts(conn, _normalize(df_today, "run", run_ts_utc))
+        _insert_validations(conn, validation)
+    return added
+
+
+# =========================
+# Migration der bestehenden Dateien
+# =========================
+def _date_ts(date_utc: str) -> str:
+    return f"{date_utc} 00:00 UTC"
+
+
+def _read_daily_json(directory: str) -> pd.DataFrame:
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, "daily", "*.json"))):
+        date_utc = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as f:
+            frames.append(pd.DataFrame(json.load(f)).assign(timestamp_utc=_date_ts(date_utc)))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _read_all_forecasts(directory: str, dated: bool = False) -> pd.DataFrame:
+    # [{"timestamp"|"date": ..., "forecasts": [...]}, ...]; dated=True -> nur die Einträge mit "date"
+    path = os.path.join(directory, "history", "all_forecasts.json")
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with open(path) as f:
+        entries = json.load(f)
+    frames = []
+    for entry in entries:
+        if dated == ("timestamp" in entry):
+            continue
+        ts = entry["timestamp"] if "timestamp" in entry else _date_ts(entry["date"])
+        frames.append(pd.DataFrame(entry.get("forecasts", [])).assign(timestamp_utc=ts))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+_TXT_LINE = re.compile(r"^(\w+): (\w+) \(Confidence: ([\d.]+), Regime: (\w+)\)")
+
+
+def _read_txt(directory: str) -> pd.DataFrame:
+    # "DAX: HOLD (Confidence: 0.00, Regime: neutral)"
+    rows = []
+    for path in sorted(glob.glob(os.path.join(directory, "txt", "*.txt"))):
+        date_utc = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as f:
+            for line in f:
+                m = _TXT_LINE.match(line.strip())
+                if m:
+                    rows.append({"timestamp_utc": _date_ts(date_utc), "asset": m[1], "signal": m[2],
+                                 "confidence": float(m[3]), "regime": m[4]})
+    return pd.DataFrame(rows)
+
+
+def migrate(directory: str = "forecasts", db_path: str = DB_PATH) -> Dict[str, int]:
+    """
+    Importiert alle Alt-Dateien (Reihenfolge = Priorität: vollständigste Quelle zuerst).
+    Returns: neue Zeilen pro Quelle
+    """
+    counts = {}
+    with connect(db_path) as conn:
+        sources = [
+            ("history", lambda: _read_history(directory), False),
+            ("daily_index_forecast", lambda: _read_csv(os.path.join(directory, "daily_index_forecast.csv")), False),
+            ("all_forecasts", lambda: _read_all_forecasts(directory), False),
+            ("all_forecasts_dated", lambda: _read_all_forecasts(directory, dated=True), True),
+            ("daily_json", lambda: _read_daily_json(directory), True),
+            ("txt", lambda: _read_txt(directory), True),
+        ]
+        for name, read, date_only in sources:
+            try:
+                df = read()
+            except Exception as e:
+                print(f"WARNING {name}: import failed ({e})")
+                continue
+            if df.empty or "asset" not in df.columns or "timestamp_utc" not in df.columns:
+                counts[name] = 0
+                continue
+            counts[name] = _insert_forecasts(conn, _normalize(df, name), date_only=date_only)
+
+        counts["validations"] = _insert_validations(conn, _read_csv(os.path.join(directory, "validation.csv")))
+    return counts
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame()
+    return pd.read_csv(path)
+
+
+def _read_history(directory: str) -> pd.DataFrame:
+    # Monats-Partitionen (history/YYYY-MM.csv) + aktive history.csv, Schemata dürfen abweichen
+    paths = sorted(glob.glob(os.path.join(directory, "history", "*.csv"))) + [os.path.join(directory, "history.csv")]
+    frames = [df for df in (_read_csv(p) for p in paths) if not df.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+# =========================
+# Abfragen
+# =========================
+def _end_bound(end: str) -> str:
+    # "YYYY-MM-DD" inklusive -> erster Zeitstempel des Folgetags
+    return (datetime.strptime(end[:10], "%Y-%m-%d").date() + timedelta(days=1)).isoformat()
+
+
+def _asset_filter(assets: Optional[Iterable[str]], column: str = "asset"):
+    if not assets:
+        return "", []
+    assets = list(assets)
+    return f" AND {column} IN ({', '.join('?' * len(assets))})", assets
+
+
+def forecasts_between(start: str, end: str, assets: Optional[Iterable[str]] = None,
+                      db_path: str = DB_PATH) -> pd.DataFrame:
+    """Alle Forecasts mit start <= Datum <= end ("YYYY-MM-DD")."""
+    where, params = _asset_filter(assets)
+    with connect(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT * FROM forecasts WHERE timestamp_utc >= ? AND timestamp_utc < ?"
+            f"{where} ORDER BY timestamp_utc, asset",
+            conn, params=[start[:10], _end_bound(end)] + params,
+        )
+
+
+def latest_per_asset(as_of: Optional[str] = None, assets: Optional[Iterable[str]] = None,
+                     db_path: str = DB_PATH) -> pd.DataFrame:
+    """Letzter Forecast pro Asset (bis einschließlich Datum as_of, Default: alles)."""
+    bound = _end_bound(as_of) if as_of else "9999"
+    where, params = _asset_filter(assets)
+    with connect(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT f.* FROM forecasts f JOIN ("
+            "  SELECT asset, MAX(timestamp_utc) AS ts FROM forecasts"
+            f"  WHERE timestamp_utc < ?{where} GROUP BY asset"
+            ") last ON f.asset = last.asset AND f.timestamp_utc = last.ts ORDER BY f.asset",
+            conn, params=[bound] + params,
+        )
+
+
+def forecasts_with_returns(start: str, end: str, assets: Optional[Iterable[str]] = None,
+                           db_path: str = DB_PATH) -> pd.DataFrame:
+    """
+    Letzter Forecast pro (asset, Tag) im Bereich + realisierte Rendite = daily_return
+    des nächsten Laufs desselben Assets (wie validate_yesterday), hit_1d wie dort.
+    """
+    where, params = _asset_filter(assets)
+    with connect(db_path) as conn:
+        return pd.read_sql_query(
+            "WITH daily AS ("
+            "  SELECT * FROM ("
+            "    SELECT f.*, ROW_NUMBER() OVER (PARTITION BY asset, date_utc ORDER BY timestamp_utc DESC) AS rn"
+            f"    FROM forecasts f WHERE timestamp_utc >= ?{where}"
+            "  ) WHERE rn = 1"
+            "), joined AS ("
+            "  SELECT daily.*,"
+            "    LEAD(date_utc) OVER w AS realized_date_utc,"
+            "    LEAD(daily_return) OVER w AS realized_return_pct"
+            "  FROM daily WINDOW w AS (PARTITION BY asset ORDER BY date_utc)"
+            ")"
+            " SELECT timestamp_utc, date_utc, asset, signal, prob_up, confidence, regime,"
+            "   realized_date_utc, realized_return_pct,"
+            "   CASE WHEN (signal = 'BUY' AND realized_return_pct > 0)"
+            "          OR (signal = 'SELL' AND realized_return_pct < 0) THEN 1 ELSE 0 END AS hit_1d"
+            " FROM joined WHERE date_utc <= ? ORDER BY date_utc, asset",
+            conn, params=[start[:10]] + params + [end[:10]],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast database (SQLite)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--migrate", action="store_true", help="Bestehende Dateien aus --dir importieren")
+    parser.add_argument("--dir", default="forecasts", help="Verzeichnis mit den Alt-Dateien")
+    parser.add_argument("--latest", action="store_true", help="Letzten Forecast pro Asset anzeigen")
+    args = parser.parse_args()
+
+    if args.migrate:
+        counts = migrate(args.dir, args.db)
+        for name, n in counts.items():
+            print(f"{name:<22} {n:>6} rows")
+        print("FORECAST DB WRITTEN:", args.db)
+
+    if args.latest:
+        print(latest_per_asset(db_path=args.db).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Concurrent forecast executor
+
+Führt eine Forecast-Funktion pro Asset in einem Thread-Pool aus.
+- Ergebnisse kommen immer in Config-Reihenfolge zurück.
+- Jedes Asset hat eine eigene Deadline (ab Start des Tasks). Wer sie reißt,
+  bekommt eine markierte HOLD-Zeile statt den ganzen Lauf zu blockieren.
+  Für jeden abgeschriebenen Task startet ein Ersatz-Worker, damit wartende
+  Assets auch dann drankommen, wenn alle Worker hängen (Laufzeit höchstens
+  ceil(Assets / Worker) * Deadline plus Rechenzeit).
+- Fehler eines Assets werden geloggt, die anderen laufen weiter.
+- Worker sind Daemon-Threads ohne Join beim Interpreter-Ende: ein hängendes
+  Asset blockiert weder run_concurrent noch das Prozessende (ThreadPoolExecutor
+  würde seine Threads beim Beenden abwarten). Netzwerk-Requests sind zusätzlich
+  über DOWNLOAD_TIMEOUT_S begrenzt.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+from config import FORECAST_WORKERS, FORECAST_TIMEOUT_S
+
+
+TIMEOUT_RULE = "TIMEOUT"
+
+
+def timeout_row(asset: str, timeout_s: float) -> Dict[str, Any]:
+    return {
+        "asset": asset,
+        "signal": "HOLD",
+        "confidence": 0.0,
+        "prob_up": 0.5,
+        "prob_down": 0.5,
+        "regime": "neutral",
+        "close": None,
+        "prev_close": None,
+        "daily_return": None,
+        "score": 0.0,
+        "rule": f"{TIMEOUT_RULE}(>{timeout_s:g}s)",
+    }
+
+
+def _worker(tasks: "queue.Queue", run: Callable[[str, Dict[str, Any]], Dict[str, Any]]) -> None:
+    while True:
+        try:
+            asset, cfg, fut = tasks.get_nowait()
+        except queue.Empty:
+            return
+        # abgesagt (Deadline eines Vorgängers / Abbruch) -> überspringen
+        if not fut.set_running_or_notify_cancel():
+            continue
+        try:
+            fut.set_result(run(asset, cfg))
+        except BaseException as e:
+            fut.set_exception(e)
+
+
+def run_concurrent(
+    assets: Dict[str, Dict[str, Any]],
+    fn: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    timeout_s: Optional[float] = None,
+    error_prefix: str = "ERROR",
+) -> List[Dict[str, Any]]:
+    """
+    fn(asset, cfg) -> result dict. Gibt die Ergebnisse in Reihenfolge von assets zurück.
+    """
+    max_workers = max_workers or FORECAST_WORKERS
+    timeout_s = FORECAST_TIMEOUT_S if timeout_s is None else timeout_s
+
+    started: Dict[str, float] = {}
+
+    def _task(asset, cfg):
+        started[asset] = time.monotonic()
+        return fn(asset, cfg)
+
+    tasks: "queue.Queue" = queue.Queue()
+    futures: Dict[str, Future] = {}
+    for asset, cfg in assets.items():
+        futures[asset] = Future()
+        tasks.put((asset, cfg, futures[asset]))
+
+    n_threads = 0
+
+    def _start_worker():
+        nonlocal n_threads
+        threading.Thread(target=_worker, args=(tasks, _task), name=f"forecast_{n_threads}", daemon=True).start()
+        n_threads += 1
+
+    for _ in range(min(max(1, max_workers), len(assets))):
+        _start_worker()
+
+    pending = set(futures.values())
+    timed_out = set()
+
+    try:
+        while pending:
+            now = time.monotonic()
+
+            # Deadline läuft erst ab Task-Start (wartende Tasks zählen nicht)
+            remaining = []
+            for asset, fut in futures.items():
+                if fut not in pending or asset not in started or not timeout_s:
+                    continue
+                left = started[asset] + timeout_s - now
+                if left <= 0:
+                    timed_out.add(asset)
+                    pending.discard(fut)
+                    fut.cancel()
+                    # hängender Thread ist verloren -> Ersatz für die Warteschlange
+                    if not tasks.empty():
+                        _start_worker()
+                else:
+                    remaining.append(left)
+
+            if not pending:
+                break
+
+            wait(pending, timeout=min(remaining) if remaining else 0.05, return_when=FIRST_COMPLETED)
+            pending = {f for f in pending if not f.done()}
+    finally:
+        # noch nicht gestartete Tasks absagen, hängende Threads nicht abwarten
+        for fut in futures.values():
+            fut.cancel()
+
+    results = []
+    for asset, fut in futures.items():
+        if asset in timed_out:
+            print(f"{error_prefix} {asset}: no result within {timeout_s:g}s -> HOLD")
+            results.append(timeout_row(asset, timeout_s))
+            continue
+
+        try:
+            results.append(fut.result())
+        except Exception as e:
+            print(f"{error_prefix} {asset}: {e}")
+
+    return results
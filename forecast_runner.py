@@ -1,11 +1,13 @@
 from forecast_asset import forecast_asset
+from data_loader import load_market_data_bulk
+from forecast_executor import run_concurrent
 
-def run_live_forecasts(assets):
-    results = []
-    for asset, cfg in assets.items():
-        try:
-            r = forecast_asset(asset, cfg)
-            results.append(r)
-        except Exception as e:
-            print(f"ERROR {asset}: {e}")
-    return results
+def run_live_forecasts(assets, max_workers=None, timeout_s=None):
+    market_data, load_errors = load_market_data_bulk(assets)
+    for asset, err in load_errors.items():
+        print(f"WARNING {asset}: bulk load failed ({err}), retrying single")
+
+    def _forecast(asset, cfg):
+        return forecast_asset(asset, cfg, df_override=market_data.get(asset))
+
+    return run_concurrent(assets, _forecast, max_workers=max_workers, timeout_s=timeout_s)
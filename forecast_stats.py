@@ -0,0 +1,201 @@
+"""Live accuracy (laufende Trefferquoten aus validate_yesterday)
+
+Zustand in forecasts/accuracy_state.json, pro Run nur O(Assets) fortgeschrieben:
+
+    totals   (asset, signal, conf_bin) -> n, hits, sum_ret, sum_sq, n_prob, brier_sum, prob_sum, up_sum
+    recent   asset -> die letzten max(WINDOWS) Validierungen (für Rolling-Fenster)
+    last_date asset -> zuletzt eingerechnetes date_utc (doppelte Läufe zählen nicht doppelt)
+
+Brier-Score pro Validierung: (prob_up - up)^2 mit up = 1, wenn today_return_pct > 0.
+prob_sum/up_sum erlauben die Zerlegung (mittlere Prognose vs. Basisrate).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+ACCURACY_STATE_PATH = "forecasts/accuracy_state.json"
+
+# Rolling-Fenster: letzte N Validierungen pro Asset (None = all-time)
+WINDOWS = (20, 60, 250)
+
+# Confidence-Bins [lo, hi)
+CONF_BINS = (0.0, 0.1, 0.2, 0.3, 0.5, 1.0)
+
+SUM_KEYS = ["n", "hits", "sum_ret", "sum_sq", "n_prob", "brier_sum", "prob_sum", "up_sum"]
+
+STATS_COLUMNS = ["asset", "signal", "conf_bin", "n", "hits", "hit_rate", "mean_ret", "std_ret", "brier", "mean_prob", "up_rate"]
+
+STATE_VERSION = 1
+
+
+def conf_bin(confidence) -> str:
+    try:
+        c = float(confidence)
+    except (TypeError, ValueError):
+        return "na"
+    if np.isnan(c):
+        return "na"
+    for lo, hi in zip(CONF_BINS[:-1], CONF_BINS[1:]):
+        if c < hi:
+            return f"{lo:.1f}-{hi:.1f}"
+    return f"{CONF_BINS[-2]:.1f}-{CONF_BINS[-1]:.1f}"
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {"version": STATE_VERSION, "totals": {}, "recent": {}, "last_date": {}}
+
+
+def load_state(path: str = ACCURACY_STATE_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return _empty_state()
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except Exception as e:
+        print(f"WARNING accuracy state unreadable ({path}): {e}")
+        return _empty_state()
+    if state.get("version") != STATE_VERSION:
+        return _empty_state()
+    return state
+
+
+def save_state(state: Dict[str, Any], path: str = ACCURACY_STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _observation(row) -> Optional[Dict[str, Any]]:
+    ret = pd.to_numeric(row.get("today_return_pct"), errors="coerce")
+    if pd.isna(ret):
+        # Kein realisierter Return -> nicht bewertbar
+        return None
+    prob = pd.to_numeric(row.get("yesterday_prob_up"), errors="coerce")
+    up = 1 if ret > 0 else 0
+    return {
+        "date": str(row["date_utc"]),
+        "signal": str(row.get("yesterday_signal")),
+        "conf_bin": conf_bin(row.get("yesterday_confidence")),
+        "hit": int(row.get("hit_1d") or 0),
+        "ret": float(ret),
+        "prob": None if pd.isna(prob) else float(prob),
+        "up": up,
+    }
+
+
+def _sums(obs: Dict[str, Any]) -> Dict[str, float]:
+    prob = obs["prob"]
+    return {
+        "n": 1,
+        "hits": obs["hit"],
+        "sum_ret": obs["ret"],
+        "sum_sq": obs["ret"] * obs["ret"],
+        # ohne prob_up kein Brier-Beitrag (Mittel über n_prob)
+        "n_prob": 0 if prob is None else 1,
+        "brier_sum": 0.0 if prob is None else (prob - obs["up"]) ** 2,
+        "prob_sum": 0.0 if prob is None else prob,
+        "up_sum": obs["up"],
+    }
+
+
+def update_state(state: Dict[str, Any], validation: pd.DataFrame) -> int:
+    """
+    Validierungszeilen (Output von validate_yesterday) einrechnen.
+    Returns: Anzahl neu gezählter Zeilen
+    """
+    added = 0
+    keep = max(WINDOWS)
+    for row in validation.to_dict("records"):
+        asset = str(row["asset"])
+        if str(row["date_utc"]) <= state["last_date"].get(asset, ""):
+            continue
+        obs = _observation(row)
+        if obs is None:
+            continue
+
+        key = "|".join((asset, obs["signal"], obs["conf_bin"]))
+        totals = state["totals"].setdefault(key, dict.fromkeys(SUM_KEYS, 0))
+        for k, v in _sums(obs).items():
+            totals[k] += v
+
+        recent = state["recent"].setdefault(asset, [])
+        recent.append(obs)
+        del recent[:-keep]
+
+        state["last_date"][asset] = obs["date"]
+        added += 1
+    return added
+
+
+def record_validation(validation: pd.DataFrame, path: str = ACCURACY_STATE_PATH) -> int:
+    """load_state + update_state + save_state (nur wenn etwas dazukam)."""
+    state = load_state(path)
+    added = update_state(state, validation)
+    if added:
+        save_state(state, path)
+    return added
+
+
+def _finish(df: pd.DataFrame) -> pd.DataFrame:
+    n = df["n"].astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = df["sum_ret"] / n
+        var = (df["sum_sq"] / n - mean * mean).clip(lower=0.0) * n / (n - 1)
+        df["hit_rate"] = df["hits"] / n
+        df["mean_ret"] = mean
+        df["std_ret"] = np.sqrt(var.where(n > 1))
+        df["brier"] = df["brier_sum"] / df["n_prob"]
+        df["mean_prob"] = df["prob_sum"] / df["n_prob"]
+        df["up_rate"] = df["up_sum"] / n
+    return df
+
+
+def accuracy_table(state: Dict[str, Any], window: Optional[int] = None, by=("asset", "signal", "conf_bin")) -> pd.DataFrame:
+    """
+    window=None: all-time (aus totals), sonst die letzten `window` Validierungen pro Asset.
+    by: Gruppierung, z.B. ("asset",) oder ("asset", "signal").
+    """
+    by = list(by)
+    if window is None:
+        rows = [dict(zip(("asset", "signal", "conf_bin"), key.split("|")), **sums) for key, sums in state["totals"].items()]
+    else:
+        rows = [
+            {"asset": asset, "signal": o["signal"], "conf_bin": o["conf_bin"], **_sums(o)}
+            for asset, recent in state["recent"].items()
+            for o in recent[-window:]
+        ]
+
+    cols = by + [c for c in STATS_COLUMNS if c not in ("asset", "signal", "conf_bin")]
+    if not rows:
+        return pd.DataFrame(columns=cols)
+
+    df = pd.DataFrame(rows).groupby(by, as_index=False)[SUM_KEYS].sum()
+    return _finish(df)[cols].sort_values(by).reset_index(drop=True)
+
+
+def accuracy_summary(state: Dict[str, Any], windows=WINDOWS) -> pd.DataFrame:
+    """Pro Asset: Trefferquote (nur BUY/SELL) und Brier für jedes Fenster + all-time."""
+    out = None
+    for window in list(windows) + [None]:
+        label = "all" if window is None else str(window)
+        t = accuracy_table(state, window, by=("asset", "signal"))
+        trades = t[t["signal"].isin(["BUY", "SELL"])].groupby("asset")[["n", "hits"]].sum()
+        brier = accuracy_table(state, window, by=("asset",)).set_index("asset")["brier"]
+        part = pd.DataFrame({
+            f"trades_{label}": trades["n"],
+            f"hit_rate_{label}": trades["hits"] / trades["n"],
+            f"brier_{label}": brier,
+        })
+        out = part if out is None else out.join(part, how="outer")
+    return out.reset_index().rename(columns={"index": "asset"}) if out is not None else pd.DataFrame()
@@ -1,16 +1,117 @@
 from __future__ import annotations
 
+import csv
+import glob
+import json
 import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import pandas as pd
 
+from forecast_stats import record_validation
+
+try:
+    import fcntl
+except ImportError:  # Windows: kein flock -> ohne Lock (nur ein Writer erwartet)
+    fcntl = None
+
 
 HISTORY_PATH = "forecasts/history.csv"
 VALIDATION_PATH = "forecasts/validation.csv"
 
+# Monate, die in history.csv bleiben (ältere -> forecasts/history/YYYY-MM.csv)
+HISTORY_KEEP_MONTHS = 1
+
+# validate_yesterday: so viele Tage zurück wird ein Forecast gesucht (Wochenende/Feiertage)
+VALIDATION_MAX_GAP_DAYS = 7
+
+VALIDATION_COLUMNS = [
+    "date_utc",
+    "asset",
+    "yesterday_signal",
+    "yesterday_prob_up",
+    "yesterday_confidence",
+    "today_return_pct",
+    "hit_1d",
+]
+
 
 def _ensure_forecasts_dir():
-    os.makedirs("forecasts", exist_ok=True)
+    os.makedirs(os.path.dirname(HISTORY_PATH) or ".", exist_ok=True)
+
+
+def _partition_dir() -> str:
+    # forecasts/history.csv -> forecasts/history/
+    return os.path.splitext(HISTORY_PATH)[0]
+
+
+def _index_dir() -> str:
+    # forecasts/history.csv -> forecasts/history_index/
+    return f"{os.path.splitext(HISTORY_PATH)[0]}_index"
+
+
+@contextmanager
+def _history_lock():
+    """Exklusiver Lock für alle Schreibzugriffe auf die History (auch parallele Läufe)."""
+    _ensure_forecasts_dir()
+    with open(f"{HISTORY_PATH}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _read_head(path: str, rows: int = 1):
+    """Header + die ersten `rows` Datenzeilen (ohne die ganze Datei zu lesen)."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        data = [r for _, r in zip(range(rows), reader)]
+    return header, data
+
+
+def _repair_tail(path: str) -> None:
+    """
+    Abgebrochener Append (Crash mitten in der Zeile) -> unvollständige letzte
+    Zeile abschneiden, damit die Datei wieder gültiges CSV ist.
+    """
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+
+        pos = size
+        while pos > 0:
+            step = min(65536, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                f.truncate(pos + nl + 1)
+                print(f"WARNING {path}: dropped incomplete last line")
+                return
+        f.truncate(0)
+
+
+def _fsync_write(path: str, text: str, mode: str) -> None:
+    with open(path, mode, newline="") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _rewrite(path: str, df: pd.DataFrame) -> None:
+    # komplette Datei atomar ersetzen (nur bei Schema-Änderung / Kompaktierung)
+    tmp = f"{path}.tmp"
+    _fsync_write(tmp, df.to_csv(index=False), "w")
+    os.replace(tmp, path)
 
 
 def append_history(df_today: pd.DataFrame, run_ts_utc: str) -> None:
@@ -18,6 +119,12 @@ def append_history(df_today: pd.DataFrame, run_ts_utc: str) -> None:
     Append today's forecasts to forecasts/history.csv
     Expected columns at least:
       asset, prev_close, current, daily_return, signal, confidence, regime, prob_up, score, rule
+
+    Append-only: es werden nur die neuen Zeilen angehängt (Lock + fsync),
+    die bestehende Datei wird nicht gelesen. Nur wenn neue Spalten dazukommen,
+    wird einmal mit erweitertem Header neu geschrieben. Ältere Monate werden
+    in forecasts/history/YYYY-MM.csv ausgelagert (compact_history).
+    Der Index des letzten Forecasts pro (Datum, Asset) wird mitgeschrieben.
     """
     _ensure_forecasts_dir()
 
@@ -41,83 +148,227 @@ def append_history(df_today: pd.DataFrame, run_ts_utc: str) -> None:
     cols = [c for c in preferred if c in df.columns] + [c for c in df.columns if c not in preferred]
     df = df[cols]
 
-    if os.path.exists(HISTORY_PATH):
-        old = pd.read_csv(HISTORY_PATH)
-        out = pd.concat([old, df], ignore_index=True)
-    else:
-        out = df
+    with _history_lock():
+        header = None
+        if os.path.exists(HISTORY_PATH) and os.path.getsize(HISTORY_PATH) > 0:
+            _repair_tail(HISTORY_PATH)
+            header, _ = _read_head(HISTORY_PATH, rows=0)
+
+        if not header:
+            _fsync_write(HISTORY_PATH, df.to_csv(index=False), "w")
+        elif set(df.columns) <= set(header):
+            # Schema passt: Spalten in Header-Reihenfolge, fehlende leer
+            _fsync_write(HISTORY_PATH, df.reindex(columns=header).to_csv(index=False, header=False), "a")
+        else:
+            # neue Spalten -> Header erweitern (einmalig O(Datei))
+            print(f"History schema changed, rewriting {HISTORY_PATH} with new columns")
+            old = pd.read_csv(HISTORY_PATH)
+            _rewrite(HISTORY_PATH, pd.concat([old, df], ignore_index=True))
+
+        _update_index(df)
+        _maybe_compact(run_ts_utc)
+
+
+def _month(ts: str) -> str:
+    return str(ts)[:7]
+
+
+def _maybe_compact(run_ts_utc: str) -> None:
+    # nur die erste Datenzeile prüfen -> konstante Kosten, Kompaktierung ~1x pro Monat
+    header, first = _read_head(HISTORY_PATH, rows=1)
+    if not header or not first or "timestamp_utc" not in header:
+        return
+    oldest = _month(first[0][header.index("timestamp_utc")])
+    if oldest < _cutoff_month(run_ts_utc):
+        _compact_locked(run_ts_utc)
+
+
+def _cutoff_month(run_ts_utc: str, keep_months: int = HISTORY_KEEP_MONTHS) -> str:
+    period = pd.Period(_month(run_ts_utc), freq="M") - (keep_months - 1)
+    return str(period)
+
+
+def _compact_locked(run_ts_utc: str, keep_months: int = HISTORY_KEEP_MONTHS) -> int:
+    hist = pd.read_csv(HISTORY_PATH)
+    if hist.empty or "timestamp_utc" not in hist.columns:
+        return 0
+
+    months = hist["timestamp_utc"].astype(str).str[:7]
+    old = months < _cutoff_month(run_ts_utc, keep_months)
+    if not old.any():
+        return 0
+
+    part_dir = _partition_dir()
+    os.makedirs(part_dir, exist_ok=True)
+
+    for month, rows in hist[old].groupby(months[old], sort=True):
+        path = os.path.join(part_dir, f"{month}.csv")
+        if os.path.exists(path):
+            existing = pd.read_csv(path)
+            # Crash nach der Partition, vor dem Kürzen -> dieselben Zeilen kommen erneut: nur neue anhängen
+            key = ["timestamp_utc", "asset"]
+            if all(c in existing.columns and c in rows.columns for c in key):
+                seen = pd.MultiIndex.from_frame(existing[key].astype(str))
+                rows = rows[~pd.MultiIndex.from_frame(rows[key].astype(str)).isin(seen)]
+            rows = pd.concat([existing, rows], ignore_index=True)
+        _rewrite(path, rows)
+
+    # Partitionen zuerst, dann die aktive Datei kürzen (Crash dazwischen -> Zeilen doppelt, bis die
+    # nächste Kompaktierung sie ohne erneutes Anhängen aus der aktiven Datei entfernt)
+    _rewrite(HISTORY_PATH, hist[~old])
+    print(f"History compacted: {int(old.sum())} rows -> {part_dir}")
+    return int(old.sum())
+
+
+def compact_history(run_ts_utc: str | None = None, keep_months: int = HISTORY_KEEP_MONTHS) -> int:
+    """
+    Lagert alle Zeilen älter als keep_months (bezogen auf run_ts_utc, Default: jetzt)
+    in Monats-Partitionen forecasts/history/YYYY-MM.csv aus. Returns: verschobene Zeilen
+    """
+    run_ts_utc = run_ts_utc or datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+    if not os.path.exists(HISTORY_PATH):
+        return 0
+    with _history_lock():
+        return _compact_locked(run_ts_utc, keep_months)
+
+
+def read_history(since: str | None = None) -> pd.DataFrame:
+    """
+    Komplette History (Monats-Partitionen + aktive Datei), chronologisch.
+    since: "YYYY-MM-DD" -> nur Partitionen ab diesem Monat lesen.
+    """
+    paths = sorted(glob.glob(os.path.join(_partition_dir(), "????-??.csv")))
+    if since is not None:
+        paths = [p for p in paths if os.path.basename(p)[:7] >= _month(since)]
+    if os.path.exists(HISTORY_PATH) and os.path.getsize(HISTORY_PATH) > 0:
+        paths.append(HISTORY_PATH)
+
+    frames = [pd.read_csv(p) for p in paths]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    hist = pd.concat(frames, ignore_index=True)
+    if since is not None and "timestamp_utc" in hist.columns:
+        hist = hist[hist["timestamp_utc"].astype(str).str[:10] >= since].reset_index(drop=True)
+    return hist
+
+
+# =========================
+# Index: letzter Forecast pro (Datum, Asset)
+# =========================
+# forecasts/history_index/YYYY-MM-DD.json  {asset: {Spalte: Wert, ...}}
+def _index_path(date_utc: str) -> str:
+    return os.path.join(_index_dir(), f"{date_utc}.json")
+
+
+def _read_index(date_utc: str) -> dict | None:
+    path = _index_path(date_utc)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
 
-    out.to_csv(HISTORY_PATH, index=False)
 
+def _write_index(date_utc: str, entries: dict) -> None:
+    os.makedirs(_index_dir(), exist_ok=True)
+    path = _index_path(date_utc)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(entries, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
 
-def validate_yesterday(df_today: pd.DataFrame, run_ts_utc: str) -> pd.DataFrame:
+
+def _update_index(rows: pd.DataFrame) -> None:
+    # NaN -> null; pro Asset gewinnt der spätere timestamp_utc (gleich: der zuletzt angehängte)
+    rows = rows.astype(object).where(rows.notna(), None)
+    for date_utc, part in rows.groupby(rows["timestamp_utc"].astype(str).str[:10], sort=True):
+        entries = _read_index(date_utc) or {}
+        for rec in part.to_dict("records"):
+            asset = str(rec.get("asset"))
+            prev = entries.get(asset)
+            if prev is None or str(rec["timestamp_utc"]) >= str(prev.get("timestamp_utc", "")):
+                entries[asset] = rec
+        _write_index(date_utc, entries)
+
+
+def rebuild_history_index() -> int:
+    """Index einmalig aus der kompletten History aufbauen (z.B. für Alt-Bestände). Returns: Tage"""
+    hist = read_history()
+    if hist.empty or "timestamp_utc" not in hist.columns:
+        return 0
+    hist = hist.sort_values("timestamp_utc", kind="stable")
+    with _history_lock():
+        _update_index(hist)
+    return int(hist["timestamp_utc"].astype(str).str[:10].nunique())
+
+
+def latest_forecasts(date_utc: str, max_gap_days: int = 0):
+    """
+    Letzter Forecast pro Asset für date_utc ("YYYY-MM-DD") oder - falls es an dem
+    Tag keinen gibt - für den nächstfrüheren Tag innerhalb max_gap_days.
+    Returns: (gefundenes Datum, DataFrame) oder (None, leerer DataFrame)
+    """
+    day = datetime.strptime(date_utc, "%Y-%m-%d").date()
+    for back in range(max_gap_days + 1):
+        d = (day - timedelta(days=back)).isoformat()
+        entries = _read_index(d)
+        if entries:
+            return d, pd.DataFrame(list(entries.values()))
+    return None, pd.DataFrame()
+
+
+def _empty_validation() -> pd.DataFrame:
+    empty = pd.DataFrame(columns=VALIDATION_COLUMNS)
+    empty.to_csv(VALIDATION_PATH, index=False)
+    return empty
+
+
+def validate_yesterday(df_today: pd.DataFrame, run_ts_utc: str, lookback_date: str | None = None,
+                       max_gap_days: int = VALIDATION_MAX_GAP_DAYS) -> pd.DataFrame:
     """
     Compare yesterday's prediction with today's realized move.
     realized_return_1d is based on today's close vs prev_close (already in df_today as daily_return).
     Then match with yesterday's stored forecast signal for same asset.
+    Die Validierung wird in die Live-Accuracy (forecast_stats) eingerechnet.
+
+    lookback_date: "YYYY-MM-DD" statt gestern. Gibt es für den Tag keinen
+    Forecast (Wochenende/Feiertag), wird der letzte Tag davor genommen
+    (höchstens max_gap_days zurück). Gelesen wird nur der History-Index dieser Tage.
     """
     _ensure_forecasts_dir()
 
-    if not os.path.exists(HISTORY_PATH):
-        # nothing to validate yet
-        empty = pd.DataFrame(columns=[
-            "date_utc",
-            "asset",
-            "yesterday_signal",
-            "yesterday_prob_up",
-            "yesterday_confidence",
-            "today_return_pct",
-            "hit_1d",
-        ])
-        empty.to_csv(VALIDATION_PATH, index=False)
-        return empty
+    if lookback_date is None:
+        # define "yesterday" by date (UTC)
+        run_dt = datetime.strptime(run_ts_utc, "%Y-%m-%d %H:%M UTC")
+        lookback_date = (run_dt.date() - timedelta(days=1)).isoformat()
 
-    hist = pd.read_csv(HISTORY_PATH)
+    if not os.path.isdir(_index_dir()) and (os.path.exists(HISTORY_PATH) or os.path.isdir(_partition_dir())):
+        # History von vor dem Index -> einmalig aufbauen
+        rebuild_history_index()
 
-    # define "yesterday" by date (UTC)
-    run_dt = datetime.strptime(run_ts_utc, "%Y-%m-%d %H:%M UTC")
-    yday_date = (run_dt.date() - timedelta(days=1)).isoformat()
-
-    # take the latest entry per asset from that UTC date
-    hist["date_utc"] = pd.to_datetime(hist["timestamp_utc"].str.replace(" UTC", ""), errors="coerce").dt.date.astype(str)
-    yday = hist[hist["date_utc"] == yday_date].copy()
+    # latest entry per asset from that UTC date (or the last date before it)
+    yday_date, yday = latest_forecasts(lookback_date, max_gap_days=max_gap_days)
     if yday.empty:
-        # no yday record (first run or weekend gap)
-        empty = pd.DataFrame(columns=[
-            "date_utc",
-            "asset",
-            "yesterday_signal",
-            "yesterday_prob_up",
-            "yesterday_confidence",
-            "today_return_pct",
-            "hit_1d",
-        ])
-        empty.to_csv(VALIDATION_PATH, index=False)
-        return empty
-
-    yday = yday.sort_values("timestamp_utc").groupby("asset", as_index=False).tail(1)
+        # nothing to validate yet (first run or gap longer than max_gap_days)
+        return _empty_validation()
 
     today = df_today.copy()
     today["today_return_pct"] = today["daily_return"]
 
     merged = yday.merge(today[["asset", "today_return_pct"]], on="asset", how="inner")
 
-    def hit(sig: str, ret: float) -> int:
-        if pd.isna(ret):
-            return 0
-        if sig == "BUY":
-            return int(ret > 0)
-        if sig == "SELL":
-            return int(ret < 0)
-        # HOLD: treat as "no bet" -> 0 (or you can use 1 if abs(ret) small)
-        return 0
-
-    merged["hit_1d"] = merged.apply(lambda r: hit(str(r.get("signal", "")), float(r.get("today_return_pct", 0.0))), axis=1)
+    # HOLD: treat as "no bet" -> 0; NaN-Return -> Vergleiche False -> 0
+    sig = merged["signal"].astype(str) if "signal" in merged.columns else pd.Series("", index=merged.index)
+    ret = pd.to_numeric(merged["today_return_pct"], errors="coerce")
+    merged["hit_1d"] = (((sig == "BUY") & (ret > 0)) | ((sig == "SELL") & (ret < 0))).astype(int)
 
     out = pd.DataFrame({
         "date_utc": yday_date,
         "asset": merged["asset"],
-        "yesterday_signal": merged["signal"],
+        "yesterday_signal": merged.get("signal", pd.Series([None]*len(merged))),
         "yesterday_prob_up": merged.get("prob_up", pd.Series([None]*len(merged))),
         "yesterday_confidence": merged.get("confidence", pd.Series([None]*len(merged))),
         "today_return_pct": merged["today_return_pct"],
@@ -125,4 +376,8 @@ def validate_yesterday(df_today: pd.DataFrame, run_ts_utc: str) -> pd.DataFrame:
     })
 
     out.to_csv(VALIDATION_PATH, index=False)
+
+    # laufende Trefferquoten (forecast_stats) um diese Validierung fortschreiben
+    with _history_lock():
+        record_validation(out)
     return out
@@ -1,7 +1,22 @@
 from datetime import datetime
 
+from forecast_executor import TIMEOUT_RULE
 
-def write_index_forecast_txt(df, filename="index_forecast.txt"):
+
+def _missing(value):
+    return value is None or value != value
+
+
+def _num(value, width, fmt=".2f", suffix=""):
+    return f"{'n/a':>{width + len(suffix)}}" if _missing(value) else f"{value:>{width}{fmt}}{suffix}"
+
+
+def _pct(value):
+    return "   n/a" if _missing(value) else f"{value * 100:>5.1f}%"
+
+
+def write_index_forecast_txt(df, filename="index_forecast.txt", accuracy=None):
+    """accuracy: forecast_stats.accuracy_summary (optional, Abschnitt LIVE ACCURACY)"""
 
     now = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
 
@@ -20,15 +35,37 @@ def write_index_forecast_txt(df, filename="index_forecast.txt"):
         lines.append("No forecast results (data fetch failed).")
     else:
         for _, row in df.iterrows():
+            # Timeout-Zeilen (forecast_executor) haben keine Kurse -> n/a + Grund
+            rule = str(row.get("rule", ""))
+            reason = f" ({rule})" if rule.startswith(TIMEOUT_RULE) else ""
             lines.append(
                 f"{row['asset']:<8} | "
-                f"{row['prev_close']:>10.2f} | "
-                f"{row['close']:>7.2f} | "
-                f"{row['daily_return']:>6.2f}% | "
+                f"{_num(row['prev_close'], 10)} | "
+                f"{_num(row['close'], 7)} | "
+                f"{_num(row['daily_return'], 6, suffix='%')} | "
                 f"{row['confidence']:>4.2f} | "
                 f"{row['regime']:<8} | "
                 f"{row['prob_up']:>6.2f} | "
-                f"{row['signal']:<5}"
+                f"{row['signal']:<5}{reason}"
+            )
+
+    if accuracy is not None and not accuracy.empty:
+        lines.append("")
+        lines.append("")
+        lines.append("LIVE ACCURACY (BUY/SELL hit rate, last N validations)")
+        lines.append("-" * 20)
+        lines.append("Index    |   20   |   60   |  250   |  all   | Trades | Brier")
+        for _, row in accuracy.iterrows():
+            trades = row.get("trades_all")
+            brier = row.get("brier_all")
+            lines.append(
+                f"{row['asset']:<8} | "
+                f"{_pct(row.get('hit_rate_20'))} | "
+                f"{_pct(row.get('hit_rate_60'))} | "
+                f"{_pct(row.get('hit_rate_250'))} | "
+                f"{_pct(row.get('hit_rate_all'))} | "
+                f"{0 if _missing(trades) else int(trades):>6} | "
+                f"{'  n/a' if _missing(brier) else f'{brier:.3f}'}"
             )
 
     lines.append("")
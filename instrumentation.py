@@ -0,0 +1,212 @@
+"""Lightweight pipeline instrumentation
+
+    with span("forecast.run_model"):
+        ...
+    count("bars_processed", len(df))
+
+- Spans summieren Aufrufe, Gesamt- und Maximalzeit pro Stage (thread-safe,
+  forecast_asset läuft im Thread-Pool).
+- Counter summieren Werte (Bars, Downloads, Bytes).
+- Abgeschaltet (Default) ist span() ein geteilter No-Op-Kontext und count()
+  ein einzelner Flag-Check -> praktisch kostenlos.
+
+Aktivieren:
+    FORECAST_METRICS=1  -> forecasts/metrics.json + forecasts/metrics.prom (Prometheus-Textformat)
+    FORECAST_PROFILE=1  -> zusätzlich cProfile-Dump forecasts/profile.pstats (+ profile.txt)
+
+cProfile erfasst nur den Thread, der profile_run betritt; für ein vollständiges
+Profil FORECAST_WORKERS = 1 setzen.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+METRICS_DIR = "forecasts"
+METRICS_JSON = "metrics.json"
+METRICS_PROM = "metrics.prom"
+PROFILE_FILE = "profile.pstats"
+
+PROM_PREFIX = "forecast"
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+ENABLED = _env_flag("FORECAST_METRICS")
+PROFILE = _env_flag("FORECAST_PROFILE")
+
+_lock = threading.Lock()
+_spans: Dict[str, Dict[str, float]] = {}
+_counters: Dict[str, float] = {}
+
+
+def enable(flag: bool = True, profile: Optional[bool] = None) -> None:
+    global ENABLED, PROFILE
+    ENABLED = flag
+    if profile is not None:
+        PROFILE = profile
+
+
+def reset() -> None:
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        with _lock:
+            s = _spans.get(self.name)
+            if s is None:
+                _spans[self.name] = {"calls": 1, "total_s": elapsed, "max_s": elapsed}
+            else:
+                s["calls"] += 1
+                s["total_s"] += elapsed
+                if elapsed > s["max_s"]:
+                    s["max_s"] = elapsed
+        return False
+
+
+def span(name: str):
+    """Zeitmessung einer Stage (auch bei Exceptions)."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def count(name: str, value: float = 1) -> None:
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "spans": {k: dict(v) for k, v in sorted(_spans.items())},
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+def _prom_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name).lower()
+
+
+def to_prometheus(metrics: Dict[str, Any], run_ts: Optional[float] = None) -> str:
+    lines = []
+
+    spans = metrics.get("spans", {})
+    for metric, key, mtype, help_text in (
+        ("stage_seconds_total", "total_s", "counter", "Gesamtzeit pro Stage"),
+        ("stage_calls_total", "calls", "counter", "Aufrufe pro Stage"),
+        ("stage_seconds_max", "max_s", "gauge", "Längster Einzelaufruf pro Stage"),
+    ):
+        full = f"{PROM_PREFIX}_{metric}"
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {mtype}")
+        for stage, s in spans.items():
+            lines.append(f'{full}{{stage="{stage}"}} {s[key]:g}')
+
+    for name, value in metrics.get("counters", {}).items():
+        full = f"{PROM_PREFIX}_{_prom_name(name)}_total"
+        lines.append(f"# TYPE {full} counter")
+        lines.append(f"{full} {value:g}")
+
+    if run_ts is not None:
+        full = f"{PROM_PREFIX}_last_run_timestamp_seconds"
+        lines.append(f"# TYPE {full} gauge")
+        lines.append(f"{full} {run_ts:.0f}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_metrics(directory: str = METRICS_DIR, run_ts_utc: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """
+    Schreibt metrics.json + metrics.prom nach directory (nur wenn aktiviert).
+    Returns: {"json": path, "prom": path} oder None
+    """
+    if not ENABLED:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    metrics = snapshot()
+    now = time.time()
+    metrics["run_ts_utc"] = run_ts_utc or datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+    paths = {
+        "json": os.path.join(directory, METRICS_JSON),
+        "prom": os.path.join(directory, METRICS_PROM),
+    }
+    _write_atomic(paths["json"], json.dumps(metrics, indent=2))
+    _write_atomic(paths["prom"], to_prometheus(metrics, run_ts=now))
+    print("Metrics:", paths["json"])
+    return paths
+
+
+@contextmanager
+def profile_run(directory: str = METRICS_DIR, top: int = 30):
+    """
+    cProfile um einen ganzen Lauf (nur wenn FORECAST_PROFILE gesetzt):
+    profile.pstats (für snakeviz/pstats) + profile.txt (Top-N nach cumtime).
+    """
+    if not PROFILE:
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, PROFILE_FILE)
+        profiler.dump_stats(path)
+
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        _write_atomic(os.path.splitext(path)[0] + ".txt", out.getvalue())
+        print("Profile:", path)
@@ -1,4 +1,6 @@
 from forecast_asset import forecast_asset
+from data_loader import load_market_data_bulk
+from forecast_executor import run_concurrent
 
 ASSETS = {
     "DAX": {"ticker": "^GDAXI"},
@@ -11,30 +13,28 @@ ASSETS = {
 
 
 def run_live_forecast():
-    results = []
-
     print("\n==============================")
     print(" LIVE FORECAST ENGINE STARTED ")
     print("==============================\n")
 
-    for asset, cfg in ASSETS.items():
-        try:
-            print(f"Running live forecast for {asset}")
-
-            forecast = forecast_asset(asset, cfg)
+    market_data, load_errors = load_market_data_bulk(ASSETS)
+    for asset, err in load_errors.items():
+        print(f"WARNING {asset}: bulk load failed ({err}), retrying single")
 
-            results.append(forecast)
+    def _forecast(asset, cfg):
+        print(f"Running live forecast for {asset}")
+        return forecast_asset(asset, cfg, df_override=market_data.get(asset))
 
-            print(
-                f"{asset} | "
-                f"Signal: {forecast.get('signal')} | "
-                f"Close: {forecast.get('close')} | "
-                f"Confidence: {forecast.get('confidence')} | "
-                f"Regime: {forecast.get('regime')}"
-            )
+    results = run_concurrent(ASSETS, _forecast, error_prefix="ERROR in")
 
-        except Exception as e:
-            print(f"ERROR in {asset}: {e}")
+    for forecast in results:
+        print(
+            f"{forecast['asset']} | "
+            f"Signal: {forecast.get('signal')} | "
+            f"Close: {forecast.get('close')} | "
+            f"Confidence: {forecast.get('confidence')} | "
+            f"Regime: {forecast.get('regime')}"
+        )
 
     return results
 
@@ -1,43 +1,95 @@
 from forecast_asset import forecast_asset
+from data_loader import load_market_data_bulk
+from forecast_executor import run_concurrent
 from config import ASSETS
 import pandas as pd
 from datetime import datetime
 import os
 
 from forecast_writer import write_index_forecast_txt
+from forecast_tracker import append_history, validate_yesterday
+from forecast_stats import accuracy_summary, load_state
+from forecast_db import record_run
 from schema_validator import validate_forecast_dataframe
+from instrumentation import span, count, profile_run, write_metrics
 
 os.makedirs("forecasts", exist_ok=True)
 
 
 def main():
-    all_results = []
     run_ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
 
-    for asset, cfg in ASSETS.items():
+    # FORECAST_PROFILE=1 -> cProfile-Dump, FORECAST_METRICS=1 -> Stage-Zeiten
+    with profile_run():
+        with span("main.total"):
+            _run(run_ts)
+
+    write_metrics(run_ts_utc=run_ts)
+
+
+def _run(run_ts):
+    all_results = []
+
+    # alle Ticker gebündelt laden (ein Request pro Intervall)
+    with span("main.bulk_load"):
+        market_data, load_errors = load_market_data_bulk(ASSETS)
+    for asset, err in load_errors.items():
+        # forecast_asset lädt dieses Asset dann einzeln (innerhalb der Deadline)
+        print(f"WARNING {asset}: bulk load failed ({err}), retrying single")
+    count("load_errors", len(load_errors))
+
+    def _forecast(asset, cfg):
         print(f"Running forecast for {asset}")
-        try:
-            result = forecast_asset(asset, cfg)
+        with span("forecast.total"):
+            return forecast_asset(asset, cfg, df_override=market_data.get(asset))
 
+    with span("main.forecast"):
+        for result in run_concurrent(ASSETS, _forecast):
             # Pflichtfelder IMMER setzen (damit Schema Validator nie mehr bricht)
-            result.setdefault("asset", asset)
             result.setdefault("timestamp_utc", run_ts)
             result.setdefault("rule", result.get("rule", ""))  # falls forecast_asset es liefert
             all_results.append(result)
-
-        except Exception as e:
-            print(f"ERROR {asset}: {e}")
+    count("assets_forecast", len(all_results))
 
     df = pd.DataFrame(all_results)
 
     # Falls keine Daten: trotzdem mit fixen Spalten speichern & txt schreiben
-    df = validate_forecast_dataframe(df)
+    with span("main.validate_schema"):
+        df = validate_forecast_dataframe(df)
 
     filename = "forecasts/daily_index_forecast.csv"
-    df.to_csv(filename, index=False)
+    with span("main.write_csv"):
+        df.to_csv(filename, index=False)
     print("Saved:", filename)
 
-    write_index_forecast_txt(df)
+    # gestrige Forecasts validieren (-> Live-Accuracy), dann heutige in die History.
+    # Jeder Schritt einzeln abgesichert: die History bekommt den Lauf auch, wenn die Validierung scheitert.
+    if not df.empty:
+        with span("main.track"):
+            validation = None
+            try:
+                validation = validate_yesterday(df, run_ts)
+            except Exception as e:
+                print(f"WARNING validation failed: {e}")
+
+            try:
+                append_history(df, run_ts)
+            except Exception as e:
+                print(f"ERROR append_history failed: {e}")
+
+            try:
+                record_run(df, run_ts, validation)
+            except Exception as e:
+                print(f"WARNING forecast db update failed: {e}")
+
+    accuracy = None
+    try:
+        accuracy = accuracy_summary(load_state())
+    except Exception as e:
+        print(f"WARNING live accuracy unavailable: {e}")
+
+    with span("main.write_txt"):
+        write_index_forecast_txt(df, accuracy=accuracy)
 
 
 if __name__ == "__main__":
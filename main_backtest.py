@@ -1,17 +1,91 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
 from asset_config import ASSETS
-from backtest_engine import run_backtest
+from backtest_engine import run_backtest, stream_backtest
 from backtest_writer import save_backtest_csv
+from backtest_store import BacktestDatasetWriter, read_backtest_dataset, BACKTEST_DATASET_DIR
+from analytics import summarize_results, ANALYTICS_COLUMNS
+from data_loader import load_market_data
+from price_store import export_assets, PRICE_STORE_DIR
+
+
+SUMMARY_PATH = "backtest_summary.csv"
+
+
+def backtest_asset(asset, cfg, store_dir=None, output="csv", horizons=None):
+    """
+    Ein Asset komplett im Worker: laden, backtesten, schreiben.
+    Zurück an den Parent geht nur die Zusammenfassung.
+
+    output="csv"     -> backtest_<asset>.csv
+    output="parquet" -> Row-Groups direkt ins Dataset (asset/year-Partitionen)
+    """
+    df = load_market_data(cfg["ticker"], cfg, intervals=("1d",), store_dir=store_dir)
+
+    if output == "parquet":
+        with BacktestDatasetWriter(BACKTEST_DATASET_DIR, asset) as writer:
+            stream_backtest(asset, cfg, writer, df=df, horizons=horizons)
+
+        results = read_backtest_dataset(BACKTEST_DATASET_DIR, assets=[asset], columns=ANALYTICS_COLUMNS)
+        target = BACKTEST_DATASET_DIR
+    else:
+        results = run_backtest(asset, cfg, df=df, horizons=horizons)
+        target = f"backtest_{asset}.csv"
+        save_backtest_csv(results, target)
+
+    summary = summarize_results(asset, results)
+    summary["file"] = target
+    return summary
+
+
+def _safe_backtest_asset(asset, cfg, store_dir=None, output="csv", horizons=None):
+    # Fehler eines Assets isolieren (Worker darf den Pool nicht abbrechen)
+    try:
+        return backtest_asset(asset, cfg, store_dir=store_dir, output=output, horizons=horizons)
+    except Exception as e:
+        print(f"ERROR {asset}: {e}")
+        return {"asset": asset, "error": str(e)}
+
+
+def run_all(assets, workers=None, output="csv", horizons=None):
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        return [_safe_backtest_asset(asset, cfg, output=output, horizons=horizons) for asset, cfg in assets.items()]
+
+    # Kursdaten einmal laden -> Worker lesen per memmap statt selbst zu laden
+    export_assets(assets, intervals=("1d",), root=PRICE_STORE_DIR)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(assets))) as pool:
+        futures = [
+            pool.submit(_safe_backtest_asset, asset, cfg, PRICE_STORE_DIR, output, horizons)
+            for asset, cfg in assets.items()
+        ]
+        # Config-Reihenfolge, unabhängig davon wer zuerst fertig ist
+        return [f.result() for f in futures]
+
 
+def main():
+    parser = argparse.ArgumentParser(description="Backtest all configured assets")
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse (Default: CPU-Kerne, 1 = sequentiell)")
+    parser.add_argument("--output", choices=["csv", "parquet"], default="csv", help="CSV pro Asset oder Parquet-Dataset")
+    parser.add_argument("--horizons", default=None, help="Zusätzliche Forward-Horizonte in Bars, z.B. 1,3,5,10,20")
+    args = parser.parse_args()
 
-all_results = {}
+    horizons = [int(h) for h in args.horizons.split(",")] if args.horizons else None
 
-for asset, cfg in ASSETS.items():
+    summaries = run_all(ASSETS, workers=args.workers, output=args.output, horizons=horizons)
 
-    results = run_backtest(asset, cfg)
+    summary_df = pd.DataFrame(summaries)
+    summary_df.to_csv(SUMMARY_PATH, index=False)
+    print(summary_df.to_string(index=False))
 
-    filename = f"backtest_{asset}.csv"
-    save_backtest_csv(results, filename)
+    print("BACKTEST FINISHED")
 
-    all_results[asset] = results
 
-print("BACKTEST FINISHED")
+if __name__ == "__main__":
+    main()
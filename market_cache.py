@@ -0,0 +1,107 @@
+"""Local OHLCV cache
+
+Ziel:
+- Bereits geladene Kursdaten lokal halten (eine Parquet-Datei pro Ticker + Intervall).
+- Bei erneutem Laden nur die Bars nach dem letzten gecachten Zeitstempel nachladen.
+
+Staleness:
+Eine Cache-Datei gilt als "frisch", solange ihr letzter Refresh (mtime) jünger als
+CACHE_MAX_AGE[interval] ist. Frische Dateien werden ohne Netzwerkzugriff gelesen.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from typing import Optional
+
+import pandas as pd
+
+
+CACHE_DIR = os.environ.get("MARKET_DATA_CACHE_DIR", "data_cache")
+
+# maximales Alter (Sekunden) bevor ein Delta-Refresh nötig ist
+CACHE_MAX_AGE = {
+    "1d": 6 * 3600,
+    "1h": 30 * 60,
+}
+DEFAULT_MAX_AGE = 3600
+
+
+def safe_ticker_name(ticker: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+
+
+def cache_path(ticker: str, interval: str, cache_dir: Optional[str] = None) -> str:
+    cache_dir = cache_dir or CACHE_DIR
+    return os.path.join(cache_dir, f"{safe_ticker_name(ticker)}_{interval}.parquet")
+
+
+def read_cache(ticker: str, interval: str, cache_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+    path = cache_path(ticker, interval, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        # kaputte Datei -> wie "kein Cache" behandeln
+        print(f"WARNING cache unreadable ({path}): {e}")
+        return None
+
+
+def write_cache(ticker: str, interval: str, df: pd.DataFrame, cache_dir: Optional[str] = None) -> str:
+    """
+    Schreibt atomar (tmp + replace), damit ein Abbruch nie eine halbe Datei hinterlässt.
+    """
+    path = cache_path(ticker, interval, cache_dir)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp = f"{path}.tmp"
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def is_fresh(ticker: str, interval: str, cache_dir: Optional[str] = None, max_age_s: Optional[int] = None) -> bool:
+    path = cache_path(ticker, interval, cache_dir)
+    if not os.path.exists(path):
+        return False
+    if max_age_s is None:
+        max_age_s = CACHE_MAX_AGE.get(interval, DEFAULT_MAX_AGE)
+    return (time.time() - os.path.getmtime(path)) < max_age_s
+
+
+def merge_bars(cached: Optional[pd.DataFrame], fresh: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Neue Bars überschreiben gleiche Zeitstempel (der letzte Bar kann beim
+    vorherigen Abruf noch unvollständig gewesen sein).
+    """
+    frames = [f for f in (cached, fresh) if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    df = pd.concat(frames, axis=0)
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+def invalidate_cache(ticker: Optional[str] = None, interval: Optional[str] = None, cache_dir: Optional[str] = None) -> int:
+    """
+    Löscht Cache-Dateien. Ohne Argumente wird der komplette Cache geleert.
+    Gibt die Anzahl gelöschter Dateien zurück.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    prefix = f"{safe_ticker_name(ticker)}_" if ticker else ""
+    suffix = f"_{interval}.parquet" if interval else ".parquet"
+
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name.endswith(suffix):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
@@ -1,3 +1,5 @@
+import math
+
 import numpy as np
 
 def run_model(df):
@@ -20,3 +22,180 @@ def run_model(df):
     return {
         "score": score
     }
+
+
+def momentum_score_series(close):
+    """
+    Score für ALLE Bars in einem Durchlauf.
+    score[k] == run_model(df.iloc[:k + 1])["score"] (gleiche Rolling-Berechnung,
+    pandas rollt vorwärts -> spätere Bars beeinflussen frühere Werte nicht).
+    """
+    ret = close.pct_change()
+
+    short = ret.rolling(5).mean().to_numpy(dtype=float)
+    long = ret.rolling(20).mean().to_numpy(dtype=float)
+
+    return np.where(np.isnan(short) | np.isnan(long), 0.0, short - long)
+
+
+# =========================
+# Streaming-Modell (O(1) pro Bar)
+# =========================
+class _RollingMean:
+    """
+    Rolling-Mean über ein festes Fenster mit Ringpuffer.
+
+    Bildet pandas rolling(n).mean() exakt nach (Kahan-kompensierte Add/Remove-
+    Summen, Vorzeichen-Zähler, Serie gleicher Werte), damit das Ergebnis
+    bit-identisch zu run_model bleibt.
+    """
+
+    __slots__ = (
+        "window", "buf", "pos", "filled",
+        "nobs", "sum_x", "neg_ct", "comp_add", "comp_remove", "same_ct", "prev",
+    )
+
+    def __init__(self, window):
+        self.window = window
+        self.buf = [0.0] * window
+        self.pos = 0
+        self.filled = 0
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_ct = 0
+        self.prev = None
+
+    def push(self, val):
+        if self.filled == self.window:
+            self._remove(self.buf[self.pos])
+        else:
+            self.filled += 1
+
+        if self.prev is None:
+            self.prev = val
+
+        self.buf[self.pos] = val
+        self.pos = (self.pos + 1) % self.window
+        self._add(val)
+
+    def _add(self, val):
+        if val != val:
+            return
+        self.nobs += 1
+        y = val - self.comp_add
+        t = self.sum_x + y
+        self.comp_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        if val == self.prev:
+            self.same_ct += 1
+        else:
+            self.same_ct = 1
+        self.prev = val
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.comp_remove
+        t = self.sum_x + y
+        self.comp_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    @property
+    def value(self):
+        if self.nobs < self.window or self.nobs == 0:
+            return float("nan")
+        if self.same_ct >= self.nobs:
+            return self.prev
+        result = self.sum_x / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+    def snapshot(self):
+        snap = {name: getattr(self, name) for name in self.__slots__}
+        snap["buf"] = list(self.buf)
+        return snap
+
+    @classmethod
+    def restore(cls, snap):
+        obj = cls(snap["window"])
+        for name in cls.__slots__:
+            setattr(obj, name, list(snap[name]) if name == "buf" else snap[name])
+        return obj
+
+
+class MomentumState:
+    """
+    Zustandsbehaftetes Momentum-Modell: einmal mit Historie seeden,
+    danach pro neuem Close ein O(1)-Update ohne DataFrame-Kopie.
+
+        state = MomentumState.from_history(df["close"])
+        state.update(new_close)
+        state.score   # == run_model(df_mit_new_close)["score"]
+
+    snapshot()/restore() liefern einen JSON-fähigen Zustand.
+    """
+
+    def __init__(self, short_window=5, long_window=20):
+        self.short = _RollingMean(short_window)
+        self.long = _RollingMean(long_window)
+        self.last_close = None
+        self.bars = 0
+
+    @classmethod
+    def from_history(cls, close, short_window=5, long_window=20):
+        state = cls(short_window, long_window)
+        for c in close:
+            state.update(c)
+        return state
+
+    def update(self, close):
+        close = float(close)
+
+        # wie pct_change(): erster Bar -> NaN
+        ret = float("nan") if self.last_close is None else close / self.last_close - 1
+        self.short.push(ret)
+        self.long.push(ret)
+
+        self.last_close = close
+        self.bars += 1
+        return self.score
+
+    @property
+    def score(self):
+        short = self.short.value
+        long = self.long.value
+        if np.isnan(short) or np.isnan(long):
+            return 0.0
+        return float(short - long)
+
+    def model_output(self):
+        # gleiches Format wie run_model
+        return {"score": self.score}
+
+    def snapshot(self):
+        return {
+            "last_close": self.last_close,
+            "bars": self.bars,
+            "short": self.short.snapshot(),
+            "long": self.long.snapshot(),
+        }
+
+    @classmethod
+    def restore(cls, snap):
+        state = cls.__new__(cls)
+        state.short = _RollingMean.restore(snap["short"])
+        state.long = _RollingMean.restore(snap["long"])
+        state.last_close = snap["last_close"]
+        state.bars = snap["bars"]
+        return state
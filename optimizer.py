@@ -1,6 +1,37 @@
+import numpy as np
 import pandas as pd
 import itertools
 
+from backtest_store import load_results
+
+
+# Spalten, die apply_filters/evaluate_strategy brauchen (Dataset: nur diese lesen)
+OPTIMIZER_COLUMNS = [
+    "date", "confidence", "close", "ema200", "signal",
+    "atr", "atr_median", "weekday", "future_return",
+]
+
+# Suchraum (Reihenfolge = itertools.product-Reihenfolge der Auswertung)
+DEFAULT_GRID = {
+    "min_conf": [0.55, 0.60, 0.65, 0.70, 0.75],
+    "trend_filter": [True, False],
+    "atr_filter": [True, False],
+    "side": ["both", "BUY", "SELL"],
+    "weekday": [None, [1,2,3], [2,3,4]],
+}
+
+MIN_TRADES = 100
+
+# Configs pro Block bei der Matrix-Auswertung (Obergrenze)
+GRID_CHUNK = 4096
+# Speicher pro Block: bool-Maske + float64-Kopie für den Matmul = 9 Bytes pro (Config, Zeile)
+# -> Block = min(GRID_CHUNK, GRID_BLOCK_BYTES / (9 x Zeilen)), z.B. ~370 Configs bei 20k Zeilen
+GRID_BLOCK_BYTES = 64 * 2**20
+
+# Forward-Return-Horizont der Backtest-Zeilen (= backtest_engine.HORIZON) -> Purge/Embargo
+FORWARD_HORIZON = 5
+
+
 def apply_filters(df, cfg):
     data = df.copy()
 
@@ -51,37 +82,332 @@ def evaluate_strategy(df):
     }
 
 
-def run_optimizer(csv_path):
+# =========================
+# Masken-Algebra: Grid in einem Durchlauf
+# =========================
+def _mask_min_conf(df, value):
+    if value is None:
+        return np.ones(len(df), dtype=bool)
+    return (df["confidence"] >= value).to_numpy()
 
-    df = pd.read_csv(csv_path)
 
-    conf_levels = [0.55, 0.60, 0.65, 0.70, 0.75]
-    trend_options = [True, False]
-    atr_options = [True, False]
-    sides = ["both", "BUY", "SELL"]
-    weekday_options = [None, [1,2,3], [2,3,4]]
+def _mask_trend_filter(df, value):
+    if not value:
+        return np.ones(len(df), dtype=bool)
+    return (
+        ((df["close"] > df["ema200"]) & (df["signal"] == "BUY")) |
+        ((df["close"] < df["ema200"]) & (df["signal"] == "SELL"))
+    ).to_numpy()
 
-    best_result = None
-    best_cfg = None
 
-    for cfg in itertools.product(conf_levels, trend_options, atr_options, sides, weekday_options):
+def _mask_atr_filter(df, value):
+    if not value:
+        return np.ones(len(df), dtype=bool)
+    return (df["atr"] > df["atr_median"]).to_numpy()
 
-        config = {
-            "min_conf": cfg[0],
-            "trend_filter": cfg[1],
-            "atr_filter": cfg[2],
-            "side": cfg[3],
-            "weekday": cfg[4]
-        }
 
-        filtered = apply_filters(df, config)
-        stats = evaluate_strategy(filtered)
+def _mask_side(df, value):
+    if value in ("BUY", "SELL"):
+        return (df["signal"] == value).to_numpy()
+    return np.ones(len(df), dtype=bool)
 
-        if stats is None:
-            continue
 
-        if best_result is None or stats["winrate"] > best_result["winrate"]:
-            best_result = stats
-            best_cfg = config
+def _mask_weekday(df, value):
+    if value is None:
+        return np.ones(len(df), dtype=bool)
+    return df["weekday"].isin(value).to_numpy()
+
+
+# eine Maske pro Option und Dimension (gleiche Semantik wie apply_filters)
+MASK_BUILDERS = {
+    "min_conf": _mask_min_conf,
+    "trend_filter": _mask_trend_filter,
+    "atr_filter": _mask_atr_filter,
+    "side": _mask_side,
+    "weekday": _mask_weekday,
+}
+
+
+def grid_size(grid=None):
+    grid = grid or DEFAULT_GRID
+    return int(np.prod([len(v) for v in grid.values()]))
+
+
+def grid_configs(grid=None, start=0, stop=None):
+    """Config-dicts in Auswertungsreihenfolge (Ausschnitt start .. stop - 1)."""
+    grid = grid or DEFAULT_GRID
+    keys = list(grid)
+    combos = itertools.islice(itertools.product(*grid.values()), start, stop)
+    return [dict(zip(keys, c)) for c in combos]
+
+
+def build_masks(df, grid=None):
+    """Returns: key -> bool-Array (Optionen x Zeilen)."""
+    grid = grid or DEFAULT_GRID
+    return {
+        key: np.vstack([MASK_BUILDERS[key](df, v) for v in options]).reshape(len(options), len(df))
+        for key, options in grid.items()
+    }
+
+
+def return_features(future_return):
+    # Spalten für einen Matmul: trades, wins, sum_ret, n_ret, gains, losses
+    r = np.asarray(future_return, dtype=float)
+    valid = ~np.isnan(r)
+    r0 = np.where(valid, r, 0.0)
+    return np.column_stack([
+        np.ones(len(r)),
+        r0 > 0,
+        r0,
+        valid,
+        np.where(r0 > 0, r0, 0.0),
+        np.where(r0 < 0, -r0, 0.0),
+    ]).astype(float)
+
+
+def block_size(n_rows, chunk=None):
+    """Configs pro Block: höchstens chunk (Default GRID_CHUNK) und innerhalb GRID_BLOCK_BYTES."""
+    return max(1, min(chunk or GRID_CHUNK, GRID_BLOCK_BYTES // (9 * max(1, n_rows))))
+
+
+def config_sums(masks, grid, start, stop, features, chunk=None):
+    """
+    Config-Maske = AND der Dimensions-Masken (blockweise), dann pro
+    Feature-Matrix (Zeilen x Features) ein Matmul.
+    Die Summen bleiben float64 (identisch zur Einzelauswertung); der Speicher
+    wird über die Blockgröße begrenzt (block_size).
+    Returns: Liste von (Configs x Features)-Summen, eine pro Feature-Matrix.
+    """
+    shape = [len(v) for v in grid.values()]
+    ids = np.arange(start, stop)
+    choice = np.unravel_index(ids, shape)
+    n_rows = next(iter(masks.values())).shape[1]
+    chunk = block_size(n_rows, chunk)
+
+    sums = [np.empty((len(ids), f.shape[1])) for f in features]
+
+    for a in range(0, len(ids), chunk):
+        b = min(a + chunk, len(ids))
+        m = np.ones((b - a, n_rows), dtype=bool)
+        for key, opt in zip(grid, choice):
+            m &= masks[key][opt[a:b]]
+        m = m.astype(float)
+        for out, f in zip(sums, features):
+            out[a:b] = m @ f
+
+    return sums
+
+
+def stats_frame(sums, grid, start, stop):
+    trades, wins, sum_ret, n_ret, gains, losses = sums.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        winrate = wins / trades
+        avg_return = sum_ret / n_ret
+        profit_factor = np.where(losses > 0, gains / losses, 0.0)
+
+    out = pd.DataFrame(grid_configs(grid, start, stop))
+    out.insert(0, "config_id", np.arange(start, stop))
+    out["trades"] = trades.astype(int)
+    out["winrate"] = winrate
+    out["avg_return"] = avg_return
+    out["profit_factor"] = profit_factor
+    out["wins"] = wins.astype(int)
+    out["sum_ret"] = sum_ret
+    out["n_ret"] = n_ret.astype(int)
+    out["gains"] = gains
+    out["losses"] = losses
+    return out
+
+
+def grid_stats(df, grid=None, start=0, stop=None, masks=None, chunk=None):
+    """
+    Kennzahlen für alle Configs start .. stop - 1 des Grids ohne Kopien von df:
+    Config-Maske = AND der vorberechneten Dimensions-Masken, Summen per
+    (Configs x Zeilen) @ (Zeilen x Features).
+
+    Returns: DataFrame mit config_id, den Grid-Spalten, trades, winrate,
+             avg_return, profit_factor (+ wins, sum_ret, n_ret, gains, losses)
+    """
+    grid = grid or DEFAULT_GRID
+    masks = masks if masks is not None else build_masks(df, grid)
+    stop = grid_size(grid) if stop is None else min(stop, grid_size(grid))
+
+    features = return_features(df["future_return"])
+    sums, = config_sums(masks, grid, start, stop, [features], chunk)
+    return stats_frame(sums, grid, start, stop)
+
+
+def select_best(stats, min_trades=MIN_TRADES):
+    """
+    Erste Config mit maximaler Winrate unter allen mit >= min_trades Trades
+    (gleiche Auswahl wie die bisherige Schleife). Returns: Zeile oder None
+    """
+    eligible = stats[stats["trades"] >= min_trades]
+    if eligible.empty:
+        return None
+    # idxmax liefert bei Gleichstand die erste Zeile
+    return eligible.loc[eligible["winrate"].idxmax()]
+
+
+def run_optimizer(csv_path, asset=None, years=None, horizon=None, grid=None):
+    """
+    csv_path: Backtest-CSV oder Dataset-Verzeichnis (dann mit asset/years filtern).
+    horizon: Forward-Return-Horizont in Bars (Default: future_return = 5 Bars).
+    grid: Suchraum (Default: DEFAULT_GRID).
+
+    Bewertet alle Configs per Masken-Algebra (grid_stats); nur die beste wird
+    noch einmal klassisch über apply_filters/evaluate_strategy ausgewertet.
+    """
+
+    df = load_results(
+        csv_path, columns=OPTIMIZER_COLUMNS, assets=[asset] if asset else None, years=years, horizon=horizon
+    )
+    grid = grid or DEFAULT_GRID
+
+    best = select_best(grid_stats(df, grid))
+    if best is None:
+        return None, None
+
+    best_id = int(best["config_id"])
+    best_cfg = grid_configs(grid, best_id, best_id + 1)[0]
+    best_result = evaluate_strategy(apply_filters(df, best_cfg))
 
     return best_cfg, best_result
+
+
+# =========================
+# Cross-Validation (walk-forward / purged k-fold)
+# =========================
+def fold_bounds(n, folds=5, mode="walk_forward", purge=FORWARD_HORIZON):
+    """
+    Zeilen-Folds über die zeitlich sortierten Backtest-Zeilen.
+    Returns: Liste von (train, test) bool-Arrays der Länge n.
+
+    walk_forward: n in folds + 1 Blöcke; Fold j trainiert auf Block 0..j
+                  (expandierend), testet auf Block j + 1.
+    kfold:        Block j ist Test, alle anderen Training.
+
+    Purge: die letzten `purge` Trainingszeilen vor einem Testblock fallen weg
+    (ihr Forward-Return reicht in den Testblock). Embargo (nur kfold): die
+    ersten `purge` Zeilen nach einem Testblock fallen ebenfalls weg.
+    """
+    if mode not in ("walk_forward", "kfold"):
+        raise ValueError(f"unknown cv mode: {mode}")
+
+    blocks = folds + 1 if mode == "walk_forward" else folds
+    edges = np.linspace(0, n, blocks + 1).round().astype(int)
+    rows = np.arange(n)
+
+    out = []
+    for j in range(folds):
+        if mode == "walk_forward":
+            t0, t1 = edges[j + 1], edges[j + 2]
+            train = rows < t0 - purge
+        else:
+            t0, t1 = edges[j], edges[j + 1]
+            train = (rows < t0 - purge) | (rows >= t1 + purge)
+        test = (rows >= t0) & (rows < t1)
+        out.append((train, test))
+    return out
+
+
+def _parameter_stability(chosen, grid):
+    """
+    Anteil der Folds, die pro Parameter den häufigsten Wert gewählt haben
+    (1.0 = in allen Folds gleich), + Anzahl verschiedener Configs.
+    """
+    stability = {"folds": len(chosen), "distinct_configs": len({c["config_id"] for c in chosen})}
+    for key in grid:
+        values = [str(c[key]) for c in chosen]
+        if not values:
+            continue
+        # bei Gleichstand der Wert aus dem früheren Fold
+        mode_value = max(values, key=values.count)
+        stability[f"{key}_mode"] = mode_value
+        stability[f"{key}_agreement"] = values.count(mode_value) / len(values)
+    return stability
+
+
+def cross_validate(source, folds=5, mode="walk_forward", purge=FORWARD_HORIZON, grid=None,
+                   min_trades=MIN_TRADES, asset=None, years=None, horizon=None):
+    """
+    Wählt pro Fold die beste Config auf dem Trainingsteil (wie run_optimizer)
+    und misst sie out-of-sample auf dem Testteil. Masken und Return-Features
+    werden einmal gebaut; jeder Fold ist nur ein gewichteter Matmul.
+
+    horizon: Forward-Horizont (future_return_<h>); purge sollte mindestens so groß sein.
+
+    Returns: (folds_df, stability)
+      folds_df : eine Zeile pro Fold (Zeiträume, Config, Train-/Test-Kennzahlen)
+      stability: Parameter-Stabilität + gepoolte OOS-Kennzahlen
+    """
+    df = load_results(
+        source, columns=OPTIMIZER_COLUMNS, assets=[asset] if asset else None, years=years, horizon=horizon
+    ).reset_index(drop=True)
+    grid = grid or DEFAULT_GRID
+    if horizon is not None:
+        purge = max(purge, horizon)
+
+    masks = build_masks(df, grid)
+    features = return_features(df["future_return"])
+    size = grid_size(grid)
+    dates = pd.to_datetime(df["date"]) if "date" in df.columns else pd.Series(df.index)
+
+    splits = fold_bounds(len(df), folds=folds, mode=mode, purge=purge)
+
+    # alle Folds in einem Durchlauf über die Config-Blöcke
+    weighted = []
+    for train, test in splits:
+        weighted += [features * train[:, None], features * test[:, None]]
+    sums = config_sums(masks, grid, 0, size, weighted)
+
+    rows = []
+    chosen = []
+    pooled = np.zeros(features.shape[1])
+
+    for j, (train, test) in enumerate(splits):
+        train_stats = stats_frame(sums[2 * j], grid, 0, size)
+        test_stats = stats_frame(sums[2 * j + 1], grid, 0, size)
+
+        row = {
+            "fold": j,
+            "mode": mode,
+            "train_rows": int(train.sum()),
+            "test_start": dates[test].min(),
+            "test_end": dates[test].max(),
+            "test_rows": int(test.sum()),
+        }
+
+        best = select_best(train_stats, min_trades=min_trades)
+        if best is None:
+            row["error"] = "no config with enough trades"
+            rows.append(row)
+            continue
+
+        cid = int(best["config_id"])
+        oos = test_stats.iloc[cid]
+        pooled += sums[2 * j + 1][cid]
+
+        row.update(grid_configs(grid, cid, cid + 1)[0])
+        row.update({
+            "config_id": cid,
+            "train_trades": int(best["trades"]),
+            "train_winrate": best["winrate"],
+            "test_trades": int(oos["trades"]),
+            "test_winrate": oos["winrate"],
+            "test_avg_return": oos["avg_return"],
+            "test_profit_factor": oos["profit_factor"],
+        })
+        rows.append(row)
+        chosen.append(row)
+
+    stability = _parameter_stability(chosen, grid)
+    stability["mode"] = mode
+    stability["oos_trades"] = int(pooled[0])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stability["oos_winrate"] = float(pooled[1] / pooled[0])
+        stability["oos_avg_return"] = float(pooled[2] / pooled[3])
+    if chosen:
+        stability["mean_train_winrate"] = float(np.mean([c["train_winrate"] for c in chosen]))
+
+    return pd.DataFrame(rows), stability
@@ -0,0 +1,225 @@
+"""Optimizer results cache (inkrementell)
+
+Pro Index + Grid werden die suffizienten Statistiken jeder Config gespeichert
+(trades, wins, sum_ret, n_ret, gains, losses = Spalten von grid_stats):
+
+    backtests/optimizer_cache/<index>_<grid_hash>.json
+        {"grid_hash": ..., "rows": n, "prefix_hash": ..., "last_row": Hash von Zeile n-1,
+         "offset": Byte-Position von Zeile n-1 in der CSV (oder null), "sums": [[...], ...]}
+
+Die Filter-Masken sind zeilenlokal -> für angehängte Zeilen genügt es, nur
+diese Zeilen zu maskieren und auf die gespeicherten Summen zu addieren.
+Geprüft wird nur die Grenze: Zeilenzahl >= n und Zeile n-1 unverändert
+(last_row). Gehasht werden nur Grenzzeile + neue Zeilen; prefix_hash wird
+fortgeschrieben (sha256(prefix_hash + Hashes der neuen Zeilen)), nie neu gerechnet.
+Revisionen vor der Grenze erkennt der Cache nicht -> dafür --no-cache.
+Sonst (Grenze verändert, Grid geändert, Cache fehlt) -> None, volle Neuberechnung.
+
+Bei CSV-Quellen liest read_tail nur ab "offset" (Header + Grenzzeile + neue
+Zeilen) -> ein Lauf ohne/mit wenigen neuen Zeilen liest die History nicht neu.
+
+Die Winrate ist ein Quotient ganzer Zahlen -> die Auswahl der besten Config
+ist identisch zur vollen Auswertung; Rendite-Summen können im letzten Bit abweichen.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest_store import select_horizon
+from optimizer import (
+    DEFAULT_GRID, OPTIMIZER_COLUMNS, build_masks, grid_size, config_sums, return_features, stats_frame,
+)
+
+
+OPTIMIZER_CACHE_DIR = "backtests/optimizer_cache"
+
+SUM_COLUMNS = ["trades", "wins", "sum_ret", "n_ret", "gains", "losses"]
+
+# bei Änderungen an Masken-/Statistik-Semantik erhöhen -> alte Caches werden ignoriert
+CACHE_VERSION = 2
+
+
+def grid_fingerprint(grid=None, horizon=None) -> str:
+    payload = json.dumps(
+        {"version": CACHE_VERSION, "grid": grid or DEFAULT_GRID, "horizon": horizon, "columns": OPTIMIZER_COLUMNS},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Ein uint64 pro Zeile über die Optimizer-Spalten (stabil über Prozesse/Läufe)."""
+    cols = [c for c in OPTIMIZER_COLUMNS if c in df.columns]
+    part = df[cols].copy()
+    if "date" in part.columns:
+        part["date"] = pd.to_datetime(part["date"]).astype("int64")
+    # Zahlen einheitlich als float64: ein Tail aus read_tail kann andere Dtypes ableiten als die volle Datei
+    for c in part.columns:
+        if c != "date" and pd.api.types.is_numeric_dtype(part[c]) and not pd.api.types.is_bool_dtype(part[c]):
+            part[c] = part[c].astype("float64")
+    return pd.util.hash_pandas_object(part, index=False).to_numpy()
+
+
+def cache_path(name: str, grid_hash: str, cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or OPTIMIZER_CACHE_DIR, f"{name}_{grid_hash[:16]}.json")
+
+
+def _read_entry(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        # kaputte Datei -> wie "kein Cache" behandeln
+        print(f"WARNING optimizer cache unreadable ({path}): {e}")
+        return None
+
+
+def _chain(prefix_hash: str, hashes: np.ndarray) -> str:
+    return hashlib.sha256(bytes.fromhex(prefix_hash) + hashes.tobytes()).hexdigest()
+
+
+def _last_line_offset(path: str) -> Optional[int]:
+    # Byte-Position der letzten Datenzeile (None: nur Header / leer)
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        pos = end
+        block = b""
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step) + block
+            body = block.rstrip(b"\r\n")
+            cut = body.rfind(b"\n")
+            if cut >= 0:
+                return pos + cut + 1
+    return None
+
+
+def _load_entry(name: str, grid, horizon, cache_dir: Optional[str]) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    grid_hash = grid_fingerprint(grid, horizon)
+    path = cache_path(name, grid_hash, cache_dir)
+    entry = _read_entry(path)
+    if entry is not None and entry.get("grid_hash") != grid_hash:
+        entry = None
+    return grid_hash, path, entry
+
+
+def read_tail(name: str, source: str, columns: List[str], grid=None, horizon=None,
+              cache_dir: Optional[str] = None) -> Optional[Tuple[pd.DataFrame, int]]:
+    """
+    CSV-Quelle ab der Grenzzeile des Caches lesen (Header + Zeile n-1 + neue Zeilen).
+    Returns: (tail, start_row) für lookup_stats oder None (kein Cache/keine CSV -> voll laden)
+    """
+    _, _, entry = _load_entry(name, grid or DEFAULT_GRID, horizon, cache_dir)
+    if entry is None or entry.get("offset") is None or not os.path.isfile(source):
+        return None
+    if horizon is not None:
+        columns = list(columns) + [f"future_return_{horizon}"]
+
+    offset = int(entry["offset"])
+    with open(source, "rb") as f:
+        header = f.readline()
+        if offset < len(header) or offset > os.fstat(f.fileno()).st_size:
+            return None
+        f.seek(offset)
+        buf = io.BytesIO(header + f.read())
+    try:
+        tail = pd.read_csv(buf, usecols=lambda c: c in columns)
+    except Exception:
+        # Offset trifft keine Zeile mehr (Datei umgeschrieben) -> voll laden
+        return None
+    return select_horizon(tail, horizon), int(entry["rows"]) - 1
+
+
+def lookup_stats(name: str, df: pd.DataFrame, grid=None, horizon=None,
+                 cache_dir: Optional[str] = None, start_row: int = 0,
+                 source: Optional[str] = None) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+    """
+    df: Zeilen start_row .. Ende des Datasets (volles Dataset oder Tail aus read_tail).
+    source: CSV-Pfad -> Offset der Grenzzeile für den nächsten read_tail fortschreiben.
+
+    Returns: (stats, info)
+      stats: grid_stats-DataFrame aus dem Cache (+ nur die neuen Zeilen eingerechnet)
+             oder None, wenn voll gerechnet werden muss
+      info : {"status": "hit" | "append" | "miss", "new_rows": k}
+    Bei "append" wird der Cache sofort fortgeschrieben.
+    """
+    grid = grid or DEFAULT_GRID
+    grid_hash, path, entry = _load_entry(name, grid, horizon, cache_dir)
+    total = start_row + len(df)
+    if entry is None:
+        return None, {"status": "miss", "new_rows": total}
+
+    # nur die Grenze prüfen: Zeile n-1 muss im df liegen und unverändert sein
+    old_rows = int(entry["rows"])
+    boundary = old_rows - 1 - start_row
+    if old_rows > total or boundary < 0:
+        return None, {"status": "miss", "new_rows": total}
+
+    hashes = row_hashes(df.iloc[boundary:])
+    if str(hashes[0]) != entry["last_row"]:
+        # Grenzzeile verändert (revidierte Daten) -> nichts wiederverwenden
+        return None, {"status": "miss", "new_rows": total}
+
+    size = grid_size(grid)
+    sums = np.asarray(entry["sums"], dtype=float).reshape(size, len(SUM_COLUMNS))
+    new_rows = total - old_rows
+
+    if new_rows == 0:
+        return stats_frame(sums, grid, 0, size), {"status": "hit", "new_rows": 0}
+
+    # nur die neuen Zeilen maskieren und aufaddieren
+    tail = df.iloc[boundary + 1:].reset_index(drop=True)
+    tail_sums, = config_sums(build_masks(tail, grid), grid, 0, size, [return_features(tail["future_return"])])
+    sums = sums + tail_sums
+
+    offset = _last_line_offset(source) if source and os.path.isfile(source) else None
+    _write_entry(path, grid_hash, total, _chain(entry["prefix_hash"], hashes[1:]), hashes[-1], offset, sums)
+
+    return stats_frame(sums, grid, 0, size), {"status": "append", "new_rows": new_rows}
+
+
+def _write_entry(path: str, grid_hash: str, rows: int, prefix_hash: str, last_row, offset: Optional[int],
+                 sums: np.ndarray) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    entry = {
+        "grid_hash": grid_hash, "rows": rows, "prefix_hash": prefix_hash, "last_row": str(last_row),
+        "offset": offset, "sums": sums.tolist(),
+    }
+    with open(tmp, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+
+
+def store_stats(name: str, df: pd.DataFrame, stats: pd.DataFrame, grid=None, horizon=None,
+                cache_dir: Optional[str] = None, source: Optional[str] = None) -> Optional[str]:
+    """
+    Speichert die Summen einer vollen grid_stats-Auswertung (Configs in Grid-Reihenfolge).
+    source: CSV-Pfad des Datasets (Offset der letzten Zeile für read_tail).
+    """
+    if df.empty:
+        return None
+    grid = grid or DEFAULT_GRID
+    grid_hash = grid_fingerprint(grid, horizon)
+    path = cache_path(name, grid_hash, cache_dir)
+
+    stats = stats.sort_values("config_id")
+    sums = stats[SUM_COLUMNS].to_numpy(dtype=float)
+    hashes = row_hashes(df)
+    offset = _last_line_offset(source) if source and os.path.isfile(source) else None
+
+    _write_entry(path, grid_hash, len(df), _chain(hashlib.sha256().hexdigest(), hashes), hashes[-1], offset, sums)
+    return path
@@ -0,0 +1,211 @@
+"""Parameter sweep (Parameter-Achse per Broadcasting)
+
+Score, MA, ATR% und |Vortagesrendite| hängen nicht von scale/Schwellen ab ->
+einmal pro Asset berechnen (SweepData), dann einen ganzen Vektor von
+Parametern als zusätzliche Achse auswerten:
+
+    prob_up   (scales  x bars)   math.tanh nur einmal pro eindeutigem scale
+    ma        (ma_lens x bars)   compute_filter_indicators nur einmal pro ma_len
+    signal    (params  x bars)   M1..M4 wie apply_trade_filter_batch
+
+Ergebnis: Kennzahlen pro Parameter-Satz in einem Durchlauf (identisch zu
+run_backtest(apply_filter=True) mit diesen Parametern).
+
+    python parameter_sweep.py --asset DAX --scales 50,100,150,200,300 --long 0.52,0.55,0.58,0.61
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from asset_config import ASSETS
+from backtest_engine import WARMUP_BARS, HORIZON
+from data_loader import load_market_data
+from decision_engine import score_to_prob_up_array
+from model_core import momentum_score_series
+from trade_filter import FILTER_PARAMS, compute_filter_indicators
+
+
+SWEEP_DIR = "backtests"
+
+DEFAULT_SCALE = 150.0
+
+PARAM_COLUMNS = ["scale", "long_th", "short_th", "ma_len", "atr_pct_max", "cooldown_absret_max"]
+STAT_COLUMNS = ["trades", "buys", "sells", "winrate", "avg_return", "profit_factor"]
+
+# Parameter-Sätze pro Block (Speicher: Block x Bars)
+SWEEP_CHUNK = 2048
+
+
+def param_grid(base: Dict[str, Any], **axes: Iterable) -> pd.DataFrame:
+    """
+    Kartesisches Produkt der angegebenen Achsen, alle anderen Spalten aus base.
+    param_grid(p, scale=[100, 150], long_th=[0.55, 0.6]) -> 4 Zeilen
+    """
+    values = {c: list(axes[c]) if axes.get(c) is not None else [base[c]] for c in PARAM_COLUMNS}
+    return pd.DataFrame(list(itertools.product(*values.values())), columns=PARAM_COLUMNS)
+
+
+class SweepData:
+    """Alles, was sich über die Parameter nicht ändert (einmal pro Asset)."""
+
+    def __init__(self, asset: str, df: pd.DataFrame):
+        self.asset = asset
+        self.df = df
+        self.close = df["close"].to_numpy(dtype=float)
+        self.score = momentum_score_series(df["close"])
+
+        # Bewertungs-Bars wie run_backtest: i in [WARMUP_BARS, n - HORIZON), Batch-Zeile i - 1
+        self.start, self.end = WARMUP_BARS, len(df) - HORIZON
+        self.future_return = self.close[self.start + HORIZON:self.end + HORIZON] / self.close[self.start:self.end] - 1
+
+        self._prob = {}
+        self._ind = {}
+
+    def _rows(self, arr):
+        return arr[self.start - 1:self.end - 1]
+
+    def prob_up(self, scales: Iterable[float]) -> np.ndarray:
+        for s in scales:
+            if s not in self._prob:
+                # gleiche Rundung wie der Backtest (forecast_asset rundet auf 4 Stellen)
+                p = score_to_prob_up_array(self._rows(self.score), s)
+                self._prob[s] = np.array([round(v, 4) for v in p.tolist()])
+        return np.vstack([self._prob[s] for s in scales])
+
+    def indicators(self, ma_lens: Iterable[int]) -> Dict[str, np.ndarray]:
+        for m in ma_lens:
+            if m not in self._ind:
+                ind = compute_filter_indicators(self.df, int(m))
+                self._ind[m] = {k: self._rows(v) for k, v in ind.items()}
+        rows = [self._ind[m] for m in ma_lens]
+        return {k: np.vstack([r[k] for r in rows]) for k in ("close", "ma", "atr_pct", "abs_ret")}
+
+
+def signal_matrix(data: SweepData, params: pd.DataFrame) -> np.ndarray:
+    """
+    final_signal für alle Parameter-Sätze: int8 (params x bars), +1 BUY, -1 SELL, 0 HOLD.
+    """
+    scales, scale_idx = np.unique(params["scale"].to_numpy(dtype=float), return_inverse=True)
+    ma_lens, ma_idx = np.unique(params["ma_len"].to_numpy(dtype=int), return_inverse=True)
+
+    prob = data.prob_up(scales.tolist())[scale_idx]
+    ind = data.indicators(ma_lens.tolist())
+    close = ind["close"][0]
+    ma = ind["ma"][ma_idx]
+    atr_pct = ind["atr_pct"][0]
+    abs_ret = ind["abs_ret"][0]
+
+    col = lambda name: params[name].to_numpy(dtype=float)[:, None]
+
+    # M1: Neutralzone (long hat Vorrang, wie im Einzelaufruf)
+    long_ = prob >= col("long_th")
+    short = ~long_ & (prob <= col("short_th"))
+
+    # M2: Trend (NaN-Vergleiche -> block)
+    ok = (long_ & (close > ma)) | (short & (close < ma))
+    # M3: Volatilität, M4: Cooldown
+    ok &= ~(atr_pct > col("atr_pct_max"))
+    ok &= ~(abs_ret > col("cooldown_absret_max"))
+
+    side = np.zeros(prob.shape, dtype=np.int8)
+    side[ok & long_] = 1
+    side[ok & short] = -1
+    return side
+
+
+def sweep_stats(side: np.ndarray, future_return: np.ndarray) -> pd.DataFrame:
+    signed = side * future_return
+    traded = side != 0
+    trades = traded.sum(axis=1)
+    hits = (signed > 0).sum(axis=1)
+    sum_ret = np.where(traded, signed, 0.0).sum(axis=1)
+    gains = np.where(signed > 0, signed, 0.0).sum(axis=1)
+    losses = -np.where(signed < 0, signed, 0.0).sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "trades": trades,
+            "buys": (side == 1).sum(axis=1),
+            "sells": (side == -1).sum(axis=1),
+            "winrate": hits / trades,
+            "avg_return": sum_ret / trades,
+            "profit_factor": np.where(losses > 0, gains / losses, 0.0),
+        })
+
+
+def run_sweep(data: SweepData, params: pd.DataFrame, chunk: int = SWEEP_CHUNK) -> pd.DataFrame:
+    """Returns: params + trades, buys, sells, winrate, avg_return, profit_factor."""
+    parts = []
+    for a in range(0, len(params), chunk):
+        block = params.iloc[a:a + chunk]
+        parts.append(sweep_stats(signal_matrix(data, block), data.future_return))
+
+    stats = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=STAT_COLUMNS)
+    return pd.concat([params.reset_index(drop=True), stats], axis=1)
+
+
+def sweep_asset(asset: str, cfg: Dict[str, Any], df: Optional[pd.DataFrame] = None, **axes) -> pd.DataFrame:
+    """
+    Sweep um die aktuellen FILTER_PARAMS (+ scale 150) eines Assets.
+    axes: scale=[...], long_th=[...], ... (fehlende Achsen = aktueller Wert)
+    """
+    print(f"Sweeping {asset}")
+
+    if df is None:
+        df = load_market_data(cfg["ticker"], cfg, intervals=("1d",))
+
+    # Assets ohne FILTER_PARAMS: DAX-Werte als Ausgangspunkt
+    base = {**FILTER_PARAMS.get(asset, FILTER_PARAMS["DAX"]), "scale": DEFAULT_SCALE}
+    result = run_sweep(SweepData(asset, df), param_grid(base, **axes))
+    result.insert(0, "asset", asset)
+    return result
+
+
+def _parse(text: Optional[str], cast=float) -> Optional[List]:
+    if not text:
+        return None
+    return [cast(x) for x in text.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensitivity sweep over scale and trade-filter thresholds")
+    parser.add_argument("--asset", action="append", default=None, help="Asset (mehrfach möglich, Default: alle)")
+    parser.add_argument("--scales", default=None, help="z.B. 50,100,150,200")
+    parser.add_argument("--long", default=None, help="long_th-Werte")
+    parser.add_argument("--short", default=None, help="short_th-Werte")
+    parser.add_argument("--ma", default=None, help="ma_len-Werte")
+    parser.add_argument("--atr", default=None, help="atr_pct_max-Werte")
+    parser.add_argument("--cooldown", default=None, help="cooldown_absret_max-Werte")
+    parser.add_argument("--out-dir", default=SWEEP_DIR)
+    args = parser.parse_args()
+
+    axes = {
+        "scale": _parse(args.scales),
+        "long_th": _parse(args.long),
+        "short_th": _parse(args.short),
+        "ma_len": _parse(args.ma, int),
+        "atr_pct_max": _parse(args.atr),
+        "cooldown_absret_max": _parse(args.cooldown),
+    }
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for asset in args.asset or list(ASSETS):
+        try:
+            result = sweep_asset(asset, ASSETS[asset], **axes)
+        except Exception as e:
+            print(f"ERROR {asset}: {e}")
+            continue
+        path = os.path.join(args.out_dir, f"sweep_{asset}.csv")
+        result.to_csv(path, index=False)
+        print("SWEEP WRITTEN:", path, f"({len(result)} parameter sets)")
+
+
+if __name__ == "__main__":
+    main()
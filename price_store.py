@@ -0,0 +1,107 @@
+"""Memory-mapped price store
+
+Binäres Spaltenformat pro Ticker + Intervall:
+
+    <root>/<ticker>_<interval>/
+        index.i8     int64  (UTC-naive Zeitstempel, ns)
+        open.f8 / high.f8 / low.f8 / close.f8 / volume.f8   float64
+        meta.json    {"rows": n, "columns": [...]}
+
+Backtest-Worker öffnen die Dateien read-only per numpy.memmap. Alle Prozesse
+teilen sich dieselben Page-Cache-Seiten, der DataFrame ist nur eine View.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from market_cache import safe_ticker_name
+
+
+PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR", "price_store")
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def store_path(ticker: str, interval: str = "1d", root: Optional[str] = None) -> str:
+    return os.path.join(root or PRICE_STORE_DIR, f"{safe_ticker_name(ticker)}_{interval}")
+
+
+def has_price_store(ticker: str, interval: str = "1d", root: Optional[str] = None) -> bool:
+    return os.path.exists(os.path.join(store_path(ticker, interval, root), "meta.json"))
+
+
+def write_price_store(ticker: str, df: pd.DataFrame, interval: str = "1d", root: Optional[str] = None) -> str:
+    """
+    Schreibt einen normalisierten Frame (data_loader) in den Store.
+    meta.json kommt zuletzt -> Leser sehen nie einen halb geschriebenen Stand.
+    """
+    path = store_path(ticker, interval, root)
+    os.makedirs(path, exist_ok=True)
+
+    columns = [c for c in FIELDS if c in df.columns]
+    if "close" not in columns:
+        raise KeyError(f"'close' not found in columns: {df.columns.tolist()}")
+
+    index = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+    arrays = {"index.i8": np.ascontiguousarray(index, dtype=np.int64)}
+    for c in columns:
+        arrays[f"{c}.f8"] = np.ascontiguousarray(df[c].to_numpy(dtype=np.float64))
+
+    for name, arr in arrays.items():
+        tmp = os.path.join(path, f"{name}.tmp")
+        arr.tofile(tmp)
+        os.replace(tmp, os.path.join(path, name))
+
+    meta_tmp = os.path.join(path, "meta.json.tmp")
+    with open(meta_tmp, "w") as f:
+        json.dump({"ticker": ticker, "interval": interval, "rows": int(len(index)), "columns": columns}, f)
+    os.replace(meta_tmp, os.path.join(path, "meta.json"))
+
+    return path
+
+
+def open_price_store(ticker: str, interval: str = "1d", root: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read-only DataFrame-View über die memmap-Spalten (keine Kopie).
+    Schreiboperationen auf dem Frame schlagen fehl -> vorher .copy() nutzen.
+    """
+    path = store_path(ticker, interval, root)
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+
+    rows = int(meta["rows"])
+    if rows == 0:
+        return pd.DataFrame(columns=meta["columns"], index=pd.DatetimeIndex([]))
+
+    def _map(name, dtype):
+        return np.memmap(os.path.join(path, name), dtype=dtype, mode="r", shape=(rows,))
+
+    index = pd.DatetimeIndex(_map("index.i8", np.int64).view("datetime64[ns]"), copy=False)
+    columns = {c: _map(f"{c}.f8", np.float64) for c in meta["columns"]}
+
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def export_assets(assets: Dict[str, Dict], intervals: Iterable[str] = ("1d",), root: Optional[str] = None) -> Dict[str, str]:
+    """
+    Lädt alle Assets einmal (Cache/yfinance) und legt sie im Store ab,
+    bevor ein Prozess-Pool startet. Returns: asset -> Fehlertext
+    """
+    from data_loader import load_timeframes
+
+    errors = {}
+    for asset, cfg in assets.items():
+        try:
+            md = load_timeframes(cfg["ticker"], intervals=tuple(intervals))
+            for interval in intervals:
+                write_price_store(cfg["ticker"], md.frame(interval), interval=interval, root=root)
+        except Exception as e:
+            errors[asset] = str(e)
+            print(f"ERROR {asset}: {e}")
+    return errors
@@ -1,5 +1,15 @@
+import numpy as np
+
+
 def adjust_for_regime(df):
     """
     Dummy-Markregime
     """
     return "neutral"
+
+
+def regime_series(df):
+    """
+    Regime für jeden Bar (nutzt nur Daten bis inkl. dieses Bars).
+    """
+    return np.full(len(df), "neutral", dtype=object)
@@ -1,4 +1,15 @@
-from optimizer import run_optimizer
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from optimizer import (
+    DEFAULT_GRID, OPTIMIZER_COLUMNS, apply_filters, build_masks, cross_validate, evaluate_strategy,
+    grid_configs, grid_size, grid_stats, select_best,
+)
+from backtest_store import load_results
+from optimizer_cache import lookup_stats, read_tail, store_stats
 
 indices = {
     "DAX": "backtests/DAX_backtest.csv",
@@ -9,13 +20,207 @@ indices = {
     "NIKKEI": "backtests/NIKKEI_backtest.csv",
 }
 
-for name, path in indices.items():
-    print(f"Optimizing {name}...")
+RESULTS_PATH = "backtests/optimizer_results.csv"
+CV_FOLDS_PATH = "backtests/optimizer_cv_folds.csv"
+CV_STABILITY_PATH = "backtests/optimizer_cv_stability.csv"
+
+RESULT_COLUMNS = ["index"] + list(DEFAULT_GRID) + ["trades", "winrate", "avg_return", "profit_factor"]
+
+
+# Worker-Zustand: Datasets kommen einmal pro Prozess (initializer), Masken pro Index einmal
+_datasets = {}
+_masks = {}
+
+
+def _init_worker(datasets):
+    global _datasets
+    _datasets = datasets
+    _masks.clear()
+
+
+def _grid_chunk(name, start, stop, grid):
+    df = _datasets[name]
+    if name not in _masks:
+        _masks[name] = build_masks(df, grid)
+    return name, grid_stats(df, grid, start, stop, masks=_masks[name])
+
+
+def load_datasets(sources, horizon=None):
+    """Jedes Backtest-Dataset genau einmal laden (nur die Optimizer-Spalten)."""
+    datasets = {}
+    errors = {}
+    for name, path in sources.items():
+        try:
+            if os.path.isdir(path):
+                datasets[name] = load_results(path, columns=OPTIMIZER_COLUMNS, assets=[name], horizon=horizon)
+            else:
+                datasets[name] = load_results(path, columns=OPTIMIZER_COLUMNS, horizon=horizon)
+        except Exception as e:
+            errors[name] = str(e)
+            print(f"ERROR {name}: {e}")
+    return datasets, errors
+
+
+def _chunk_bounds(n, chunks):
+    step = -(-n // max(1, chunks))
+    return [(a, min(a + step, n)) for a in range(0, n, step)]
+
+
+def optimize_all(sources=None, workers=None, chunks_per_index=None, grid=None, horizon=None, loaded=None,
+                 use_cache=True, cache_dir=None):
+    """
+    Optimiert alle Indizes parallel: (Index x Grid-Chunk) als Tasks auf einem
+    Prozess-Pool, danach pro Index die beste Config (wie run_optimizer).
+    loaded: bereits geladenes (datasets, errors) aus load_datasets.
+    use_cache: Config-Statistiken aus optimizer_cache (nur neue Zeilen rechnen; ohne
+               loaded werden CSV-Quellen mit Cache nur ab der Grenzzeile gelesen).
+
+    Returns: DataFrame (eine Zeile pro Index, sortiert nach winrate)
+    """
+    sources = sources or indices
+    grid = grid or DEFAULT_GRID
+    workers = workers or os.cpu_count() or 1
+
+    parts = {name: [] for name in sources}
+
+    # CSV-Quellen mit Cache: nur Grenzzeile + neue Zeilen lesen, die History bleibt ungelesen
+    cached = set()
+    if use_cache and loaded is None:
+        for name, path in sources.items():
+            try:
+                tail = read_tail(name, path, OPTIMIZER_COLUMNS, grid, horizon, cache_dir)
+            except Exception as e:
+                print(f"WARNING {name}: cache tail unreadable ({e}), loading full dataset")
+                tail = None
+            if tail is None:
+                continue
+            stats, info = lookup_stats(name, tail[0], grid, horizon, cache_dir, start_row=tail[1], source=path)
+            if stats is not None:
+                print(f"CACHE {name}: {info['status']} ({info['new_rows']} new rows, tail read)")
+                parts[name].append(stats)
+                cached.add(name)
+
+    datasets, errors = loaded or load_datasets({n: p for n, p in sources.items() if n not in cached}, horizon=horizon)
+
+    # Cache-Treffer / angehängte Zeilen: O(neue Zeilen), kein Task nötig
+    pending = list(datasets)
+    if use_cache:
+        pending = []
+        for name, df in datasets.items():
+            stats, info = lookup_stats(name, df, grid, horizon, cache_dir, source=sources.get(name))
+            print(f"CACHE {name}: {info['status']} ({info['new_rows']} new rows)")
+            if stats is None:
+                pending.append(name)
+            else:
+                parts[name].append(stats)
+
+    # genug Tasks, damit alle Kerne auch bei wenigen Indizes ausgelastet sind
+    chunks = chunks_per_index or max(1, -(-workers // max(1, len(pending))))
+    tasks = [
+        (name, a, b, grid)
+        for name in pending
+        for a, b in _chunk_bounds(grid_size(grid), chunks)
+    ]
+
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(datasets)
+        for task in tasks:
+            name, stats = _grid_chunk(*task)
+            parts[name].append(stats)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker, initargs=(datasets,)) as pool:
+            for name, stats in pool.map(_grid_chunk, *zip(*tasks)):
+                parts[name].append(stats)
+
+    if use_cache:
+        for name in pending:
+            store_stats(
+                name, datasets[name], pd.concat(parts[name], ignore_index=True), grid, horizon, cache_dir,
+                source=sources.get(name),
+            )
+
+    rows = []
+    for name in sources:
+        if name in errors:
+            rows.append({"index": name, "error": errors[name]})
+            continue
+
+        best = select_best(pd.concat(parts[name], ignore_index=True))
+        if best is None:
+            rows.append({"index": name, "error": "no config with enough trades"})
+            continue
+
+        best_id = int(best["config_id"])
+        cfg = grid_configs(grid, best_id, best_id + 1)[0]
+        if name in datasets:
+            # Kennzahlen der besten Config wie gehabt über apply_filters/evaluate_strategy
+            stats = evaluate_strategy(apply_filters(datasets[name], cfg))
+        else:
+            # nur Tail gelesen -> Kennzahlen aus den Cache-Summen
+            stats = {k: best[k] for k in ("trades", "winrate", "avg_return", "profit_factor")}
+        rows.append({"index": name, **cfg, **stats})
+
+    out = pd.DataFrame(rows)
+    for col in RESULT_COLUMNS:
+        if col not in out.columns:
+            out[col] = None
+    extra = [c for c in out.columns if c not in RESULT_COLUMNS]
+    out = out[RESULT_COLUMNS + extra]
+
+    return out.sort_values(["winrate", "index"], ascending=[False, True], na_position="last").reset_index(drop=True)
+
+
+def cross_validate_all(sources=None, mode="walk_forward", folds=5, horizon=None, loaded=None):
+    """
+    Walk-forward/k-fold pro Index.
+    Returns: (folds_df, stability_df) über alle Indizes
+    """
+    sources = sources or indices
+    datasets, errors = loaded or load_datasets(sources, horizon=horizon)
+
+    fold_tables = []
+    stability = []
+    for name in sources:
+        if name in errors:
+            stability.append({"index": name, "error": errors[name]})
+            continue
+        f, st = cross_validate(datasets[name], folds=folds, mode=mode, horizon=horizon)
+        f.insert(0, "index", name)
+        fold_tables.append(f)
+        stability.append({"index": name, **st})
+
+    folds_df = pd.concat(fold_tables, ignore_index=True) if fold_tables else pd.DataFrame()
+    return folds_df, pd.DataFrame(stability)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize all indices in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse (Default: CPU-Kerne, 1 = sequentiell)")
+    parser.add_argument("--chunks", type=int, default=None, help="Grid-Chunks pro Index (Default: nach Kernen)")
+    parser.add_argument("--horizon", type=int, default=None, help="Forward-Return-Horizont (future_return_<h>)")
+    parser.add_argument("--out", default=RESULTS_PATH, help="Ergebnistabelle (CSV)")
+    parser.add_argument("--no-cache", action="store_true", help="Config-Statistiken immer voll neu rechnen")
+    parser.add_argument("--cv", choices=["walk_forward", "kfold"], default=None, help="Zusätzlich Out-of-Sample-Validierung")
+    parser.add_argument("--folds", type=int, default=5)
+    args = parser.parse_args()
+
+    # jedes Dataset genau einmal laden (Optimierung + CV); ohne CV liest der Cache nur neue Zeilen
+    loaded = load_datasets(indices, horizon=args.horizon) if args.cv else None
+
+    results = optimize_all(
+        workers=args.workers, chunks_per_index=args.chunks, horizon=args.horizon, loaded=loaded, use_cache=not args.no_cache
+    )
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    results.to_csv(args.out, index=False)
+    print("OPTIMIZER RESULTS WRITTEN:", args.out)
+
+    if args.cv:
+        folds_df, stability = cross_validate_all(mode=args.cv, folds=args.folds, horizon=args.horizon, loaded=loaded)
+        folds_df.to_csv(CV_FOLDS_PATH, index=False)
+        stability.to_csv(CV_STABILITY_PATH, index=False)
+        print("CV RESULTS WRITTEN:", CV_FOLDS_PATH, CV_STABILITY_PATH)
 
-    cfg, stats = run_optimizer(path)
 
-    print("BEST CONFIG:")
-    print(cfg)
-    print("RESULT:")
-    print(stats)
-    print("--------------")
+if __name__ == "__main__":
+    main()
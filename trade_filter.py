@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import Dict, Any, Tuple
+import numpy as np
 import pandas as pd
 
 
@@ -185,3 +186,159 @@ def apply_trade_filter(
         "rule": rule,
         "prob_down": round(prob_down, 4),
     }
+
+
+# =========================
+# Batch: ganze Serie in einem Durchlauf
+# =========================
+# Outcome-Codes pro Maßnahme
+M1_NEUTRAL, M1_LONG, M1_SHORT = 0, 1, 2
+RULE_SKIPPED, RULE_OK, RULE_BLOCK = 0, 1, 2
+
+# Kompakter Rule-Code (uint8): je 2 Bit für M1..M4, M1 == 3 -> "no_params"
+RULE_CODE_NO_PARAMS = 3
+
+
+def encode_rule_codes(m1, m2, m3, m4) -> np.ndarray:
+    m1, m2, m3, m4 = (np.asarray(m, dtype=np.uint8) for m in (m1, m2, m3, m4))
+    return m1 | (m2 << 2) | (m3 << 4) | (m4 << 6)
+
+
+def decode_rule_codes(codes) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    codes = np.asarray(codes, dtype=np.uint8)
+    return codes & 3, (codes >> 2) & 3, (codes >> 4) & 3, (codes >> 6) & 3
+
+
+def compute_filter_indicators(df: pd.DataFrame, ma_len: int, atr_n: int = 14) -> Dict[str, np.ndarray]:
+    """
+    MA, ATR% und |Vortagesrendite| für jeden Bar k so, wie apply_trade_filter sie
+    auf df.iloc[:k + 1] berechnen würde (inkl. Kurz-Historie-Fallback der MA).
+    """
+    close = _get_series(df, "close")
+    high = _get_series(df, "high")
+    low = _get_series(df, "low")
+    n = len(close)
+
+    # _compute_ma: Prefix kürzer als ma_len -> MA über den ganzen Prefix (mind. 20 Bars)
+    ma = close.rolling(ma_len).mean().to_numpy(dtype=float, copy=True)
+    if n and ma_len > 1:
+        head = min(ma_len - 1, n)
+        expanding = close.iloc[:head].expanding(min_periods=20).mean().to_numpy(dtype=float)
+        ma[:head] = expanding
+
+    prev_close = close.shift(1)
+    tr = pd.concat([(high - low).abs(), (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    atr = tr.rolling(atr_n).mean().to_numpy(dtype=float)
+
+    c = close.to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        atr_pct = np.where(c == 0, 999.0, atr / c * 100.0)
+
+        abs_ret = np.zeros(n)
+        if n > 1:
+            abs_ret[1:] = np.abs((c[1:] / c[:-1] - 1.0) * 100.0)
+
+    return {"close": c, "ma": ma, "atr_pct": atr_pct, "abs_ret": abs_ret}
+
+
+def apply_trade_filter_batch(
+    asset_name: str,
+    df: pd.DataFrame,
+    prob_up,
+    params: Dict[str, Any] | None = None,
+    signal=None,
+    render: bool = True,
+) -> pd.DataFrame:
+    """
+    apply_trade_filter für jeden Bar von df in einem linearen Durchlauf.
+    Zeile k entspricht apply_trade_filter(asset_name, df.iloc[:k + 1], {"prob_up": prob_up[k]}).
+
+    Spalten: final_signal, m1..m4 (Outcome-Codes), ma, atr_pct, abs_ret
+    und (render=True) der gleiche rule-String wie im Einzelaufruf.
+    params überschreibt FILTER_PARAMS[asset_name] (z.B. für Parameter-Suchen).
+    """
+    if params is None:
+        params = FILTER_PARAMS.get(asset_name)
+
+    p = np.asarray(prob_up, dtype=float)
+    n = len(p)
+
+    if params is None:
+        base = np.asarray(signal, dtype=object) if signal is not None else np.full(n, "HOLD", dtype=object)
+        out = pd.DataFrame({"final_signal": base}, index=df.index)
+        if render:
+            out["rule"] = "no_params"
+        return out
+
+    ind = compute_filter_indicators(df, params["ma_len"])
+    close, ma, atr_pct, abs_ret = ind["close"], ind["ma"], ind["atr_pct"], ind["abs_ret"]
+
+    # M1: Neutralzone
+    m1 = np.where(p >= params["long_th"], M1_LONG, np.where(p <= params["short_th"], M1_SHORT, M1_NEUTRAL))
+    active = m1 != M1_NEUTRAL
+
+    # M2: Trend (NaN-Vergleiche sind False -> block, wie im Einzelaufruf)
+    trend_ok = np.where(m1 == M1_LONG, close > ma, close < ma)
+    m2 = np.where(active, np.where(trend_ok, RULE_OK, RULE_BLOCK), RULE_SKIPPED)
+    active &= m2 == RULE_OK
+
+    # M3: Volatilität
+    m3 = np.where(active, np.where(atr_pct > params["atr_pct_max"], RULE_BLOCK, RULE_OK), RULE_SKIPPED)
+    active &= m3 == RULE_OK
+
+    # M4: Cooldown
+    m4 = np.where(active, np.where(abs_ret > params["cooldown_absret_max"], RULE_BLOCK, RULE_OK), RULE_SKIPPED)
+    active &= m4 == RULE_OK
+
+    final = np.where(active, np.where(m1 == M1_LONG, "BUY", "SELL"), "HOLD").astype(object)
+
+    out = pd.DataFrame({
+        "final_signal": final,
+        "m1": m1.astype(np.int8),
+        "m2": m2.astype(np.int8),
+        "m3": m3.astype(np.int8),
+        "m4": m4.astype(np.int8),
+        "ma": ma,
+        "atr_pct": atr_pct,
+        "abs_ret": abs_ret,
+    }, index=df.index)
+
+    if render:
+        out["rule"] = render_rules(out, params)
+    return out
+
+
+def render_rule(m1, m2, m3, m4, atr_pct, abs_ret, params: Dict[str, Any]) -> str:
+    """
+    Rule-String aus Outcome-Codes (identisch zu apply_trade_filter).
+    """
+    if m1 == M1_NEUTRAL:
+        return "M1:neutral_zone"
+
+    if m1 == M1_LONG:
+        rule = f"M1:prob_up>={params['long_th']}"
+    else:
+        rule = f"M1:prob_up<={params['short_th']}"
+
+    if m2 == RULE_BLOCK:
+        op = "<=" if m1 == M1_LONG else ">="
+        return f"{rule}+M2:block_trend(close{op}MA{params['ma_len']})"
+    rule = f"{rule}+M2:trend_ok"
+
+    if m3 == RULE_BLOCK:
+        return f"{rule}+M3:block_ATR({atr_pct:.2f}%>{params['atr_pct_max']}%)"
+    rule = f"{rule}+M3:atr_ok({atr_pct:.2f}%)"
+
+    if m4 == RULE_BLOCK:
+        return f"{rule}+M4:block_cooldown(|ret|={abs_ret:.2f}%)"
+    return f"{rule}+M4:cooldown_ok(|ret|={abs_ret:.2f}%)"
+
+
+def render_rules(batch: pd.DataFrame, params: Dict[str, Any]) -> list:
+    return [
+        render_rule(*row, params)
+        for row in zip(
+            batch["m1"].tolist(), batch["m2"].tolist(), batch["m3"].tolist(), batch["m4"].tolist(),
+            batch["atr_pct"].tolist(), batch["abs_ret"].tolist(),
+        )
+    ]